@@ -0,0 +1,97 @@
+import time
+import threading
+from collections import OrderedDict
+
+
+RECONCILE_INTERVAL = 30
+CLOSED_HISTORY = 1000
+
+
+class AccountState:
+    def __init__(self):
+        self.lock = threading.Condition()
+        self.orders = {}
+        self.closed = OrderedDict()
+        self.positions = {}
+        self.details = {}
+        self.fill_ids = set()
+        self.listeners = []
+        self.connected = False
+        self.reconciled = 0.0
+
+    def Live(self) -> bool:
+        return self.connected and time.monotonic() - self.reconciled < RECONCILE_INTERVAL
+
+    def OnOrder(self, order: dict):
+        with self.lock:
+            order_id = str(order['id'])
+            if order.get('status') == 'closed':
+                self.orders.pop(order_id, None)
+                self.closed[order_id] = order
+                if len(self.closed) > CLOSED_HISTORY:
+                    self.closed.popitem(last=False)
+            else:
+                self.orders[order_id] = order
+            self.lock.notify_all()
+
+    def OnFill(self, fill: dict):
+        with self.lock:
+            fill_id = fill.get('id')
+            if fill_id is not None:
+                if fill_id in self.fill_ids:
+                    return
+                self.fill_ids.add(fill_id)
+
+            market = fill['market']
+            size = fill['size'] if fill['side'] == 'buy' else -fill['size']
+            position = self.positions.get(market, 0.0) + size
+            self.positions[market] = position
+            self.lock.notify_all()
+
+        for listener in self.listeners:
+            listener(fill, position)
+
+    def Details(self, market: str) -> list:
+        with self.lock:
+            net_size = self.positions.get(market, 0.0)
+            detail = self.details.get(market)
+            if detail is None:
+                return [0.0, 0.0, net_size, 0.0]
+            return [detail.get('realizedPnl', detail.get('realizePnl', 0.0)),
+                    detail.get('unrealizedPnl', detail.get('unrealizePnl', 0.0)),
+                    net_size, detail['entryPrice']]
+
+    def OpenOrders(self, market: str) -> list:
+        with self.lock:
+            return [order for order in self.orders.values() if order['market'] == market]
+
+    def Closed(self, orderId: str) -> dict:
+        with self.lock:
+            return self.closed.get(str(orderId))
+
+    def Reconcile(self, positions: dict):
+        if positions is None or not ('result' in positions):
+            return
+        with self.lock:
+            seen = set()
+            for position in positions['result']:
+                market = position['future']
+                seen.add(market)
+                local = self.positions.get(market)
+                if local is not None and local != position['netSize']:
+                    print("Position Drift Corrected ", market, local, position['netSize'])
+                self.positions[market] = position['netSize']
+                self.details[market] = position
+            for market in self.positions:
+                if not (market in seen):
+                    self.positions[market] = 0.0
+            self.reconciled = time.monotonic()
+
+    def Reconcile_Orders(self, market: str, openOrders: list):
+        if openOrders is None:
+            return
+        with self.lock:
+            for order_id in [i for i, o in self.orders.items() if o['market'] == market]:
+                self.orders.pop(order_id)
+            for order in openOrders:
+                self.orders[str(order['id'])] = order.get('info', order)
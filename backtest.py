@@ -0,0 +1,345 @@
+import sys
+import copy
+import json
+import datetime
+from concurrent.futures import ProcessPoolExecutor
+from orderbook import OrderBook
+from orders import OrderManager, ORDER_NOT_FOUND
+from requote import RequoteScheduler
+from volatility import RollingVolatility
+from strategy import StrategyParams, Compute_Quote, Order_Sides
+
+
+VOL_ESTIMATOR = "parkinson"
+VOL_WINDOW = 30
+LATENCY = 0.05
+MAKER_FEE = 0.0002
+TAKER_FEE = 0.0007
+
+
+def Event_Time(value) -> float:
+    if isinstance(value, str):
+        return datetime.datetime.fromisoformat(value).timestamp()
+    return float(value)
+
+
+def Load_Events(path: str) -> list:
+    events = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line != "":
+                events.append(json.loads(line))
+    return events
+
+
+class SimExchange:
+    def __init__(self, market: str, depth: int, latency: float = LATENCY, maker_fee: float = MAKER_FEE,
+                 taker_fee: float = TAKER_FEE):
+        self.market = market
+        self.book = OrderBook(market, depth)
+        self.latency = latency
+        self.maker_fee = maker_fee
+        self.taker_fee = taker_fee
+        self.time = 0.0
+        self.orders = {}
+        self.pending = []
+        self.next_id = 1
+        self.position = 0.0
+        self.cash = 0.0
+        self.fees = 0.0
+        self.volume = 0.0
+        self.fills = 0
+        self.maker_fills = 0
+        self.rejects = 0
+        self.fill_events = 0
+
+    def _ccxt(self, order: dict) -> dict:
+        return {'id': str(order['id']), 'symbol': order['market'], 'side': order['side'], 'price': order['price'],
+                'amount': order['size'], 'filled': order['filledSize'], 'status': order['status'],
+                'info': order}
+
+    def PlaceOrder(self, market: str, side: str, price: float, _type: str, size: float, reduceOnly: bool, ioc: bool,
+                   postOnly: bool):
+        if size <= 0:
+            self.rejects += 1
+            return [None, "error"]
+        order = {'id': self.next_id, 'market': market, 'side': side, 'price': price, 'size': size,
+                 'filledSize': 0.0, 'status': 'new', 'postOnly': postOnly, 'queue': 0.0}
+        self.next_id += 1
+        self.orders[str(order['id'])] = order
+        self.pending.append([self.time + self.latency, 'place', str(order['id'])])
+        return [self._ccxt(order), None]
+
+    def CancelOrder(self, orderId: str):
+        if not (str(orderId) in self.orders):
+            return [None, "error"]
+        self.pending.append([self.time + self.latency, 'cancel', str(orderId)])
+        return ["Order queued for cancellation", None]
+
+    def ModifyOrder(self, orderId: str, market: str, side: str, price: float, size: float):
+        order = self.orders.get(str(orderId))
+        if order is None:
+            return [None, ORDER_NOT_FOUND]
+        self.CancelOrder(orderId)
+        remaining = size - order['filledSize']
+        return self.PlaceOrder(market, side, price, "limit", remaining, False, False, order['postOnly'])
+
+    def CancelAllOrders(self, market: str):
+        for orderId in list(self.orders):
+            self.pending.append([self.time + self.latency, 'cancel', orderId])
+        return ["Orders queued for cancellation", None]
+
+    def GetOpenOrders(self, market: str):
+        return [[self._ccxt(o) for o in self.orders.values()], None]
+
+    def GetPositions(self, showAvgPrice: bool):
+        return [{'success': True, 'result': [{'future': self.market, 'netSize': self.position, 'entryPrice': 0.0,
+                                              'realizedPnl': 0.0, 'unrealizedPnl': 0.0}]}, None]
+
+    def Advance(self, timestamp: float):
+        self.time = timestamp
+        if len(self.pending) == 0:
+            return
+        due = [p for p in self.pending if p[0] <= timestamp]
+        if len(due) == 0:
+            return
+        self.pending = [p for p in self.pending if p[0] > timestamp]
+        for _, action, orderId in due:
+            order = self.orders.get(orderId)
+            if order is None:
+                continue
+            if action == 'cancel':
+                self.orders.pop(orderId)
+            elif action == 'place':
+                self._activate(order)
+
+    def _activate(self, order: dict):
+        if len(self.book.bids) == 0 or len(self.book.asks) == 0:
+            self.orders.pop(str(order['id']))
+            self.rejects += 1
+            return
+        best_bid = self.book.bids.Best()
+        best_ask = self.book.asks.Best()
+        crosses = (order['side'] == 'buy' and order['price'] >= best_ask) or \
+                  (order['side'] == 'sell' and order['price'] <= best_bid)
+        if crosses:
+            if order['postOnly']:
+                self.orders.pop(str(order['id']))
+                self.rejects += 1
+                return
+            price = best_ask if order['side'] == 'buy' else best_bid
+            self._fill(order, order['size'], price, False)
+            return
+
+        side = self.book.bids if order['side'] == 'buy' else self.book.asks
+        order['queue'] = side.Size(order['price'])
+        order['status'] = 'open'
+
+    def _fill(self, order: dict, size: float, price: float, maker: bool):
+        size = min(size, order['size'] - order['filledSize'])
+        if size <= 0:
+            return
+        order['filledSize'] = order['filledSize'] + size
+        signed = size if order['side'] == 'buy' else -size
+        fee = size * price * (self.maker_fee if maker else self.taker_fee)
+        self.position = self.position + signed
+        self.cash = self.cash - signed * price - fee
+        self.fees = self.fees + fee
+        self.volume = self.volume + size * price
+        self.fills += 1
+        self.fill_events += 1
+        if maker:
+            self.maker_fills += 1
+        if order['filledSize'] >= order['size']:
+            order['status'] = 'closed'
+            self.orders.pop(str(order['id']), None)
+
+    def OnBook(self, data: dict, partial: bool):
+        if partial:
+            self.book.Snapshot(data)
+        else:
+            self.book.Apply(data)
+        if len(self.book.bids) == 0 or len(self.book.asks) == 0:
+            return
+        best_bid = self.book.bids.Best()
+        best_ask = self.book.asks.Best()
+        for order in list(self.orders.values()):
+            if order['status'] != 'open':
+                continue
+            if order['side'] == 'buy':
+                if best_ask <= order['price']:
+                    self._fill(order, order['size'], order['price'], True)
+                else:
+                    order['queue'] = min(order['queue'], self.book.bids.Size(order['price']))
+            else:
+                if best_bid >= order['price']:
+                    self._fill(order, order['size'], order['price'], True)
+                else:
+                    order['queue'] = min(order['queue'], self.book.asks.Size(order['price']))
+
+    def OnTrade(self, side: str, price: float, size: float):
+        for order in list(self.orders.values()):
+            if order['status'] != 'open':
+                continue
+            if side == 'sell' and order['side'] == 'buy' and price <= order['price']:
+                resting = order['price'] == price
+            elif side == 'buy' and order['side'] == 'sell' and price >= order['price']:
+                resting = order['price'] == price
+            else:
+                continue
+
+            if not resting:
+                self._fill(order, order['size'], order['price'], True)
+                continue
+            available = size - order['queue']
+            order['queue'] = max(0.0, order['queue'] - size)
+            if available > 0:
+                self._fill(order, available, order['price'], True)
+
+
+class Backtest:
+    def __init__(self, params: StrategyParams, latency: float = LATENCY, maker_fee: float = MAKER_FEE,
+                 taker_fee: float = TAKER_FEE):
+        self.params = params
+        self.exchange = SimExchange(params.market, params.order_book_depth, latency, maker_fee, taker_fee)
+        self.vol = RollingVolatility(int(params.volatility_interval), VOL_WINDOW)
+        self.manager = OrderManager(self.exchange, params.market)
+        # The live loop's requote policy, on simulated time.
+        self.requote = RequoteScheduler(clock=lambda: self.exchange.time)
+        self.last_vol = 0.0
+        self.inventory_target = 0.0
+        self.quotes = 0
+        self.inventory_sum = 0.0
+        self.inventory_samples = 0
+        self.max_inventory = 0.0
+        self.min_inventory = 0.0
+        self.last_mid = 0.0
+
+    def Run(self, events: list) -> dict:
+        for event in events:
+            self.Step(event)
+        return self.Stats()
+
+    def Step(self, msg: dict):
+        exchange = self.exchange
+        data = msg.get('data')
+        if msg.get('channel') == 'orderbook':
+            exchange.Advance(Event_Time(data.get('time', exchange.time)))
+            exchange.OnBook(data, msg.get('type') == 'partial')
+            if len(exchange.book.bids) > 0 and len(exchange.book.asks) > 0:
+                self.last_mid = (exchange.book.bids.Best() + exchange.book.asks.Best()) / 2
+                self.vol.Update(exchange.time, self.last_mid)
+                self.On_Book()
+        elif msg.get('channel') == 'trades':
+            for trade in data:
+                exchange.Advance(Event_Time(trade['time']))
+                exchange.OnTrade(trade['side'], trade['price'], trade['size'])
+        else:
+            return
+
+        if exchange.fill_events > 0:
+            exchange.fill_events = 0
+            self.requote.OnInventory(exchange.position)
+        if self.quotes == 0 or self.requote.Due(self.params.order_time) is not None:
+            self.Quote()
+
+        position = exchange.position
+        self.inventory_sum = self.inventory_sum + position
+        self.inventory_samples += 1
+        self.max_inventory = max(self.max_inventory, position)
+        self.min_inventory = min(self.min_inventory, position)
+
+    def On_Book(self):
+        # Same triggers main.On_Book feeds the live scheduler.
+        stats = self.exchange.book.Stats(self.params.order_book_depth)
+        if stats is not None:
+            self.requote.OnPrice(stats[1])
+        if self.vol.Ready(VOL_ESTIMATOR):
+            self.requote.OnSigma(self.vol.Sigma(VOL_ESTIMATOR))
+
+    def Quote(self):
+        params = self.params
+        exchange = self.exchange
+        stats = exchange.book.Stats(params.order_book_depth)
+        if stats is None or not self.vol.Ready(VOL_ESTIMATOR):
+            return
+
+        sigma = self.vol.Sigma(VOL_ESTIMATOR)
+        if sigma == 0:
+            sigma = self.last_vol
+        sigma = round(sigma * 100) / 100
+        if sigma == 0:
+            return
+        self.last_vol = sigma
+
+        midpoint, weighted_midpoint, kappa, best_bid, best_ask = stats
+        weighted_midpoint = round(weighted_midpoint * 100) / 100
+
+        self.manager.Sync()
+        quote = Compute_Quote(params, sigma, weighted_midpoint, kappa, exchange.position, self.inventory_target)
+        self.inventory_target = quote['inventory_target']
+        sides = Order_Sides(quote['aggressive_reserve_price'], quote['spread'], params.post_only, best_bid, best_ask,
+                            params.inventory_cutoff, quote['target_distance'])
+        self.manager.Quote(sides, quote['order_trade_amount'], params.post_only)
+
+        self.requote.Quoted(weighted_midpoint, quote['spread'], exchange.position, sigma)
+        self.quotes += 1
+
+    def Stats(self) -> dict:
+        exchange = self.exchange
+        samples = max(1, self.inventory_samples)
+        return {
+            'pnl': exchange.cash + exchange.position * self.last_mid,
+            'fees': exchange.fees,
+            'volume': exchange.volume,
+            'fills': exchange.fills,
+            'maker_fills': exchange.maker_fills,
+            'rejects': exchange.rejects,
+            'quotes': self.quotes,
+            'final_inventory': exchange.position,
+            'mean_inventory': self.inventory_sum / samples,
+            'max_inventory': self.max_inventory,
+            'min_inventory': self.min_inventory
+        }
+
+
+_events = {}
+
+
+def _sweep_job(job: list) -> list:
+    path, params, gamma, minimum_spread, price_aggressor = job
+    if not (path in _events):
+        _events[path] = Load_Events(path)
+    params = copy.copy(params)
+    params.gamma = gamma
+    params.minimum_spread = minimum_spread
+    params.price_aggressor = price_aggressor
+    return [gamma, minimum_spread, price_aggressor, Backtest(params).Run(_events[path])]
+
+
+def Sweep(path: str, params: StrategyParams, gammas: list, minimum_spreads: list, price_aggressors: list,
+          processes: int = None) -> list:
+    jobs = []
+    for gamma in gammas:
+        for minimum_spread in minimum_spreads:
+            for price_aggressor in price_aggressors:
+                jobs.append([path, params, gamma, minimum_spread, price_aggressor])
+    with ProcessPoolExecutor(processes) as pool:
+        return list(pool.map(_sweep_job, jobs))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 6:
+        print("Usage: python backtest.py <recorded.jsonl> <market> <stake> <upper> <lower> [processes]")
+        exit(0)
+
+    sweep_processes = int(sys.argv[6]) if len(sys.argv) > 6 else None
+    base = StrategyParams(sys.argv[2], float(sys.argv[3]), float(sys.argv[4]), float(sys.argv[5]), 1.0, 1.0, "60", 10,
+                          0.5, 0.01, 5, 0.0, 1.0, True, 0.0)
+    results = Sweep(sys.argv[1], base, [0.1, 0.3, 0.5, 0.7, 0.9], [0.0, 0.5, 1.0], [0.5, 1.0, 2.0], sweep_processes)
+    results.sort(key=lambda result: result[3]['pnl'], reverse=True)
+    print("Gamma   Min Spread   Aggressor   PnL   Fills   Max |Inventory|")
+    for gamma, minimum_spread, price_aggressor, stats in results:
+        print(gamma, minimum_spread, price_aggressor, round(stats['pnl'], 4), stats['fills'],
+              max(stats['max_inventory'], -stats['min_inventory']))
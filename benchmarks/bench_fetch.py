@@ -0,0 +1,82 @@
+import os
+import sys
+import time
+import asyncio
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import ftx_client
+import ratelimit
+import main
+from fetch import ResilientFetcher
+from mock_exchange import MockExchange
+
+
+MARKET = "ETH-PERP"
+DEPTH = 10
+FETCHES = 100
+# As in bench_suite: the scheduler still grants every request, but the 30/s limit never queues them.
+BENCH_RATE = 1e9
+# [name, MockExchange.SetFaults arguments for the order book route]
+SCENARIOS = [
+    ["clean", {}],
+    ["5xx 20%", {'error_rate': 0.2}],
+    ["slow 20%", {'slow_rate': 0.2, 'slow_delay': 0.5}],
+    ["partial 20%", {'partial_rate': 0.2}],
+    ["mixed 10% each", {'error_rate': 0.1, 'slow_rate': 0.1, 'slow_delay': 0.5, 'partial_rate': 0.1}],
+    ["outage", {'error_rate': 1.0}]
+]
+
+
+def Run_Scenario(exchange: MockExchange, faults: dict) -> dict:
+    exchange.SetFaults('orderbook', **faults)
+    # A fresh fetcher per scenario, so the breaker and counters start closed and at zero.
+    main.book_fetcher = ResilientFetcher(main.Book_Request, main.Book_Stats)
+
+    latencies = []
+    served = 0
+    i = 0
+    while i < FETCHES:
+        start = time.perf_counter()
+        if main.Kappa(DEPTH, MARKET) is not None:
+            served += 1
+        latencies.append(time.perf_counter() - start)
+        i += 1
+
+    latencies.sort()
+    result = dict(main.book_fetcher.stats)
+    result['served'] = served
+    result['trips'] = main.book_fetcher.breaker.trips
+    result['p50_ms'] = latencies[len(latencies) // 2] * 1000
+    result['p99_ms'] = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    result['max_ms'] = latencies[-1] * 1000
+    return result
+
+
+if __name__ == '__main__':
+    # Drives main's Kappa REST fallback (Public_Get through ResilientFetcher) against the mock exchange
+    # with injected faults, and reports how often it hedged, retried and tripped the breaker.
+    exchange = MockExchange()
+    exchange.SetBook(MARKET, [[3000.0 - level * 0.1, 1.0] for level in range(DEPTH * 2)],
+                     [[3000.1 + level * 0.1, 1.0] for level in range(DEPTH * 2)])
+
+    ratelimit._scheduler = ratelimit.RequestScheduler(BENCH_RATE, BENCH_RATE)
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    ftx_client.URL = asyncio.run_coroutine_threadsafe(exchange.Start(), loop).result()
+    main.market_feed = None
+
+    print("Scenario          Served   p50 (ms)  p99 (ms)  max (ms)  Requests  Hedges  Retries  Failures  "
+          "Rejected  Trips")
+    try:
+        for name, faults in SCENARIOS:
+            result = Run_Scenario(exchange, faults)
+            print(name.ljust(17), (str(result['served']) + "/" + str(FETCHES)).ljust(8),
+                  ("%.1f" % result['p50_ms']).ljust(9), ("%.1f" % result['p99_ms']).ljust(9),
+                  ("%.1f" % result['max_ms']).ljust(9), str(result['requests']).ljust(9),
+                  str(result['hedges']).ljust(7), str(result['retries']).ljust(8), str(result['failures']).ljust(9),
+                  str(result['rejected']).ljust(9), result['trips'])
+    finally:
+        asyncio.run_coroutine_threadsafe(exchange.Stop(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
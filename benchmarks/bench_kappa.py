@@ -0,0 +1,88 @@
+import os
+import sys
+import random
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from orderbook import OrderBook
+
+
+DEPTHS = [10, 50, 100, 250, 500, 1000]
+TICKS = 2000
+
+
+def List_Kappa(response: dict, depth: int) -> list:
+    bid_price = []
+    bid_size = []
+    ask_price = []
+    ask_size = []
+
+    i = 0
+    while i < depth:
+        bid_price.append(response['result']['bids'][i][0])
+        bid_size.append(response['result']['bids'][i][1])
+        ask_price.append(response['result']['asks'][i][0])
+        ask_size.append(response['result']['asks'][i][1])
+        i += 1
+
+    kappa = 0.0
+    total_bid_size = 0.0
+    total_ask_size = 0.0
+    j = 0
+    while j < depth:
+        kappa = kappa + (bid_price[j] * bid_size[j]) + (ask_price[j] * ask_size[j])
+        total_bid_size = total_bid_size + bid_size[j]
+        total_ask_size = total_ask_size + ask_size[j]
+        j += 1
+
+    midpoint = (bid_price[0] + ask_price[0]) / 2
+    imbalance = total_bid_size / (total_bid_size + total_ask_size)
+    weighted_midpoint = (imbalance * ask_price[0]) + ((1 - imbalance) * bid_price[0])
+    return [midpoint, weighted_midpoint, kappa, bid_price[0], ask_price[0]]
+
+
+def Make_Updates(depth: int, count: int) -> list:
+    updates = []
+    i = 0
+    while i < count:
+        level = random.randint(0, depth * 2)
+        size = random.choice([0.0, 0.5, 1.0, 2.5])
+        if random.random() < 0.5:
+            updates.append({'bids': [[3000.0 - level * 0.1, size]]})
+        else:
+            updates.append({'asks': [[3000.1 + level * 0.1, size]]})
+        i += 1
+    return updates
+
+
+def Run(depth: int) -> list:
+    bids = [[3000.0 - i * 0.1, 1.0 + (i % 7)] for i in range(depth * 3)]
+    asks = [[3000.1 + i * 0.1, 1.0 + (i % 5)] for i in range(depth * 3)]
+    response = {'result': {'bids': bids[:depth], 'asks': asks[:depth]}}
+
+    book = OrderBook("BENCH-PERP", depth)
+    book.Snapshot({'bids': bids, 'asks': asks})
+    updates = Make_Updates(depth, TICKS)
+
+    def list_tick():
+        for _ in updates:
+            List_Kappa(response, depth)
+
+    def book_tick():
+        for update in updates:
+            book.Apply(update)
+            book.Stats(depth)
+
+    list_time = min(timeit.repeat(list_tick, number=1, repeat=3)) / TICKS
+    book_time = min(timeit.repeat(book_tick, number=1, repeat=3)) / TICKS
+    return [list_time, book_time]
+
+
+if __name__ == '__main__':
+    random.seed(7)
+    print("Depth      List Loop (us)   Incremental Book (us)   Speedup")
+    for depth in DEPTHS:
+        list_time, book_time = Run(depth)
+        print(str(depth).ljust(10), ("%.2f" % (list_time * 1e6)).ljust(16),
+              ("%.2f" % (book_time * 1e6)).ljust(23), "%.1fx" % (list_time / book_time))
@@ -0,0 +1,56 @@
+import os
+import sys
+import hmac
+import timeit
+import hashlib
+import datetime
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from ftx_client import URL, FtxClient, Signer
+
+
+REQUESTS = 20000
+API = "k" * 40
+SECRET = "s" * 40
+SUBACCOUNT = "market-making"
+PATH = "orders"
+BODY = {'market': "ETH-PERP", 'side': "buy", 'price': 3000.5, 'type': "limit", 'size': 0.01, 'reduceOnly': False,
+        'ioc': False, 'postOnly': True}
+
+
+def Legacy_Sign(secret: str, signaturePayload: str) -> str:
+    encoded_secret = secret.encode()
+    secret_byte_array = bytearray(encoded_secret)
+    encoded_sgPayload = signaturePayload.encode()
+    sgPayload_byte_array = bytearray(encoded_sgPayload)
+    return hmac.new(secret_byte_array, sgPayload_byte_array, hashlib.sha256).hexdigest()
+
+
+def Legacy_Request(method: str, path: str, body):
+    ts = str(int(datetime.datetime.utcnow().timestamp() * 1000))
+    signaturePayload = ts + method + "/api/" + path + str(body)
+    signature = Legacy_Sign(SECRET, signaturePayload)
+    header = {
+        'Content-Type': 'application/json',
+        'FTX-KEY': API,
+        'FTX-SIGN': signature,
+        'FTX-TS': ts,
+        'FTX-SUBACCOUNT': SUBACCOUNT
+    }
+    req = requests.Request(method=method, headers=header, url=(URL + path), json=body)
+    return req.prepare()
+
+
+if __name__ == '__main__':
+    # Only the signing path is exercised, so skip the session and ccxt setup in FtxClient.__init__.
+    client = FtxClient.__new__(FtxClient)
+    client.signer = Signer(API, SECRET, SUBACCOUNT)
+
+    print("Request          Legacy (req/s)   Pre-keyed (req/s)   Speedup")
+    for method, body in [["GET", ""], ["POST", BODY]]:
+        legacy = min(timeit.repeat(lambda: Legacy_Request(method, PATH, body), number=REQUESTS, repeat=3))
+        fast = min(timeit.repeat(lambda: client.signRequest(method, PATH, body), number=REQUESTS, repeat=3))
+        print((method + " " + PATH).ljust(16), ("%.0f" % (REQUESTS / legacy)).ljust(16),
+              ("%.0f" % (REQUESTS / fast)).ljust(19), "%.1fx" % (legacy / fast))
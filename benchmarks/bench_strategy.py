@@ -0,0 +1,56 @@
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from strategy import StrategyParams, Compute_Quote, Compute_Quotes
+
+
+ROWS = 1000000
+
+
+def Make_Rows(count: int) -> list:
+    rng = np.random.default_rng(7)
+    sigmas = np.round(rng.uniform(0.5, 50.0, count) * 100) / 100
+    midpoints = np.round(rng.uniform(2500.0, 3500.0, count) * 100) / 100
+    kappas = rng.uniform(1e4, 1e7, count)
+    inventories = np.round(rng.uniform(-2.0, 2.0, count) * 1000) / 1000
+    gammas = rng.choice([0.1, 0.3, 0.5, 0.7, 0.9], count)
+    return [sigmas, midpoints, kappas, inventories, gammas]
+
+
+def Scalar(params: StrategyParams, rows: list) -> dict:
+    sigmas, midpoints, kappas, inventories, gammas = [column.tolist() for column in rows]
+    result = dict((key, []) for key in ['inventory_target', 'target_distance', 'order_trade_amount',
+                                        'reserve_price', 'aggressive_reserve_price', 'spread'])
+    i = 0
+    while i < len(sigmas):
+        params.gamma = gammas[i]
+        quote = Compute_Quote(params, sigmas[i], midpoints[i], kappas[i], inventories[i], 0.0)
+        for key, value in quote.items():
+            result[key].append(value)
+        i += 1
+    return result
+
+
+if __name__ == '__main__':
+    params = StrategyParams("ETH-PERP", 3000.0, 3400.0, 2600.0, 1.0, 1.0, "60", 10, 0.5, 0.01, 5, 0.5, 1.0, True, 0.0)
+    rows = Make_Rows(ROWS)
+
+    start = time.perf_counter()
+    scalar = Scalar(params, rows)
+    scalar_time = time.perf_counter() - start
+
+    sigmas, midpoints, kappas, inventories, gammas = rows
+    start = time.perf_counter()
+    vector = Compute_Quotes(params, sigmas, midpoints, kappas, inventories, 0.0, gammas)
+    vector_time = time.perf_counter() - start
+
+    for key in scalar:
+        mismatches = int(np.count_nonzero(np.asarray(scalar[key]) != vector[key]))
+        print(key.ljust(26), "mismatches:", mismatches)
+    print("Rows:", ROWS)
+    print("Scalar (s): %.3f   Vectorized (s): %.3f   Speedup: %.1fx" % (scalar_time, vector_time,
+                                                                         scalar_time / vector_time))
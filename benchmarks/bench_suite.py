@@ -0,0 +1,362 @@
+import os
+import sys
+import gc
+import json
+import time
+import random
+import asyncio
+import threading
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import ftx_client
+import ratelimit
+import main
+from ftx_client import FtxClient, Signer, Get_Session, Get_Scheduler
+from orders import ORDER_NOT_FOUND
+from mock_exchange import MockExchange
+from orderbook import OrderBook
+from volatility import RollingVolatility
+from eventlog import EventLog
+from strategy import StrategyParams, Reservation_Price, Optimal_Spread, Compute_Quote, Order_Sides
+
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+MARKET = "ETH-PERP"
+DEPTH = 10
+INTERVAL = 60
+ITERATIONS = 200
+ROUNDS = 5
+WARMUP = 20
+ALLOC_ITERATIONS = 50
+# The mock exchange shares the box with the client, so runs vary by tens of percent; tighten with
+# --threshold on a quiet, pinned machine.
+REGRESSION = 0.5
+# Differences below this are timer and scheduler noise on the sub-microsecond rows.
+NOISE_FLOOR_US = 5.0
+# A fixed interpreter workload timed just before every row. This box's speed drifts by as much as 2x,
+# within a run as well as between runs, so each row's baseline is scaled by how fast the box ran the
+# workload next to it now against when the baseline was recorded.
+CALIBRATION_LOOP = 2000
+CALIBRATION_ITERATIONS = 50
+CREDENTIALS = ("bench", "bench", "")
+# The scheduler still queues and grants every request, but with a budget the suite never exhausts,
+# so REST rows measure the request path rather than the 30/s exchange limit.
+BENCH_RATE = 1e9
+
+
+class RestClient(FtxClient):
+    # FtxClient with ccxt swapped for the raw signed REST calls, so orders reach the mock exchange
+    # through the same signing, scheduler and session path as every other request. Production orders go
+    # through ccxt, so the rows that place orders are labelled as adapter timings.
+    def __init__(self, api: str, secret: str, subaccount: str):
+        self.api = api
+        self.secret = secret
+        self.subaccount = subaccount
+        self.client = Get_Session()
+        self.scheduler = Get_Scheduler()
+        self.signer = Signer(api, secret, subaccount)
+
+    def PlaceOrder(self, market: str, side: str, price: float, _type: str, size: float, reduceOnly: bool, ioc: bool,
+                   postOnly: bool):
+        resp, err = self._post("orders", {'market': market, 'side': side, 'price': price, 'type': _type, 'size': size,
+                                          'reduceOnly': reduceOnly, 'ioc': ioc, 'postOnly': postOnly})
+        if err is not None or resp is None or not resp.get('success'):
+            return [None, "error"]
+        return [resp['result'], None]
+
+    def GetOpenOrders(self, market: str):
+        resp, err = self._get("orders?market=" + market, "")
+        if err is not None or resp is None:
+            return [None, "error"]
+        return [resp['result'], None]
+
+    def CancelOrder(self, orderId: str):
+        return self._delete("orders/" + str(orderId), "")
+
+    def ModifyOrder(self, orderId: str, market: str, side: str, price: float, size: float):
+        resp, err = self._post("orders/" + str(orderId) + "/modify", {'price': price, 'size': size})
+        if resp is not None and not resp.get('success') and "already closed" in str(resp.get('error')):
+            return [None, ORDER_NOT_FOUND]
+        if err is not None or resp is None or not resp.get('success'):
+            return [None, "error"]
+        return [resp['result'], None]
+
+    def CancelAllOrders(self, market: str):
+        return self._delete("orders", {'market': market})
+
+
+def Load_Books(path: str) -> list:
+    books = []
+    book = OrderBook(MARKET, 100)
+    with open(path) as f:
+        for line in f:
+            msg = json.loads(line)
+            if msg.get('channel') != 'orderbook' or msg.get('market') != MARKET:
+                continue
+            if msg['type'] == 'partial':
+                book.Snapshot(msg['data'])
+            elif book.ready:
+                book.Apply(msg['data'])
+            else:
+                continue
+            books.append([book.Bids(DEPTH * 2), book.Asks(DEPTH * 2)])
+    return books
+
+
+def Synthetic_Books(count: int) -> list:
+    rng = random.Random(7)
+    books = []
+    mid = 3000.0
+    i = 0
+    while i < count:
+        mid = round(mid + rng.choice([-0.1, 0.0, 0.0, 0.1]), 2)
+        bids = [[round(mid - 0.05 - level * 0.1, 2), round(rng.uniform(0.5, 3.0), 3)] for level in range(DEPTH * 2)]
+        asks = [[round(mid + 0.05 + level * 0.1, 2), round(rng.uniform(0.5, 3.0), 3)] for level in range(DEPTH * 2)]
+        books.append([bids, asks])
+        i += 1
+    return books
+
+
+def Candles(books: list) -> list:
+    now = int(time.time()) // INTERVAL * INTERVAL
+    candles = []
+    k = 0
+    while k < main.VOL_WINDOW + 1:
+        bids, asks = books[(k * 7) % len(books)]
+        mid = (bids[0][0] + asks[0][0]) / 2
+        candles.append({'time': (now - INTERVAL * (main.VOL_WINDOW + 1 - k)) * 1000, 'open': mid,
+                        'high': mid + 1.5, 'low': mid - 1.5, 'close': mid + 0.2, 'volume': 10.0})
+        k += 1
+    return candles
+
+
+def Calibrate(i: int) -> int:
+    total = 0
+    k = 0
+    while k < CALIBRATION_LOOP:
+        total += k * k
+        k += 1
+    return total
+
+
+def Calibration() -> float:
+    timed = []
+    i = 0
+    while i < CALIBRATION_ITERATIONS:
+        start = time.perf_counter_ns()
+        Calibrate(i)
+        timed.append(time.perf_counter_ns() - start)
+        i += 1
+    return min(timed) / 1000
+
+
+def Measure(fn, iterations: int = ITERATIONS, rounds: int = ROUNDS) -> dict:
+    calibration = Calibration()
+    i = 0
+    while i < WARMUP:
+        fn(i)
+        i += 1
+
+    # Best-of-rounds p50, as timeit does, so background load on the box doesn't read as a regression;
+    # the spread of the round medians is kept as the row's noise. The tail percentiles are taken over
+    # every sample.
+    samples = []
+    medians = []
+    gc.collect()
+    r = 0
+    while r < rounds:
+        timed = []
+        i = 0
+        while i < iterations:
+            start = time.perf_counter_ns()
+            fn(i)
+            timed.append(time.perf_counter_ns() - start)
+            i += 1
+        timed.sort()
+        medians.append(timed[len(timed) // 2])
+        samples.extend(timed)
+        r += 1
+
+    # Untimed allocation pass. Per call: the traced peak above the level it started at, i.e. the bytes it
+    # had allocated at once, temporaries included. Over the pass: blocks still alive at the end. The mock
+    # exchange and event log threads are traced too, so REST rows include their share.
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot().filter_traces(ignore)
+    allocated = 0
+    i = 0
+    while i < ALLOC_ITERATIONS:
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        fn(i)
+        _, peak = tracemalloc.get_traced_memory()
+        allocated += peak - current
+        i += 1
+    after = tracemalloc.take_snapshot().filter_traces(ignore)
+    tracemalloc.stop()
+    retained = sum(stat.count_diff for stat in after.compare_to(before, 'filename'))
+
+    samples.sort()
+    n = len(samples)
+    return {
+        'count': n,
+        'mean_us': sum(samples) / n / 1000,
+        'p50_us': min(medians) / 1000,
+        'p50_spread_us': (max(medians) - min(medians)) / 1000,
+        'calibration_us': calibration,
+        'p99_us': samples[min(n - 1, int(n * 0.99))] / 1000,
+        'max_us': samples[-1] / 1000,
+        'allocated_bytes_per_call': allocated / ALLOC_ITERATIONS,
+        'retained_blocks_per_call': retained / ALLOC_ITERATIONS
+    }
+
+
+def Run(books: list) -> dict:
+    exchange = MockExchange()
+    exchange.SetBook(MARKET, books[0][0], books[0][1])
+    exchange.SetCandles(MARKET, Candles(books))
+    exchange.SetPosition(MARKET, 0.25, 2995.0)
+
+    ratelimit._scheduler = ratelimit.RequestScheduler(BENCH_RATE, BENCH_RATE)
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    ftx_client.URL = asyncio.run_coroutine_threadsafe(exchange.Start(), loop).result()
+
+    client = RestClient(*CREDENTIALS)
+    ftx_client._clients[CREDENTIALS] = client
+    main.log = EventLog(None, console=False)
+    main.market_feed = None
+
+    params = StrategyParams(MARKET, 3000.0, 3400.0, 2600.0, 1.0, 1.0, str(INTERVAL), DEPTH, 0.5, 0.01, 0, 0.5, 1.0,
+                            True, 0.0)
+    vol = RollingVolatility(INTERVAL, main.VOL_WINDOW)
+    vol.Seed(Candles(books))
+    main.volatility[MARKET] = vol
+
+    def advance(i: int):
+        bids, asks = books[i % len(books)]
+        exchange.SetBook(MARKET, bids, asks)
+
+    stream_book = OrderBook(MARKET, DEPTH)
+
+    def stream_kappa(i: int):
+        bids, asks = books[i % len(books)]
+        stream_book.Snapshot({'bids': bids, 'asks': asks})
+        stream_book.Stats(DEPTH)
+
+    def rest_kappa(i: int):
+        advance(i)
+        main.Kappa(DEPTH, MARKET)
+
+    def candles(i: int):
+        now = int(time.time())
+        client.GetHistoricalPrices(MARKET, INTERVAL, main.VOL_WINDOW, now - INTERVAL * main.VOL_WINDOW, now)
+
+    def positions(i: int):
+        main.Get_Positions(CREDENTIALS[0], CREDENTIALS[1], CREDENTIALS[2], MARKET)
+
+    def place_order(i: int):
+        bids, asks = books[i % len(books)]
+        main.Place_Order(CREDENTIALS[0], CREDENTIALS[1], CREDENTIALS[2], 0.01, (bids[0][0] + asks[0][0]) / 2, 0.5,
+                         0, True, MARKET, bids[0][0], asks[0][0], 0.0, 0.0)
+
+    def iteration(i: int):
+        advance(i)
+        sigma = round(main.Sigma(MARKET, 1.0) * 100) / 100
+        midpoint, weighted_midpoint, kappa, best_bid, best_ask = main.Kappa(DEPTH, MARKET)
+        weighted_midpoint = round(weighted_midpoint * 100) / 100
+        realized_pnl, unrealized_pnl, inventory, entry_price = main.Get_Positions(CREDENTIALS[0], CREDENTIALS[1],
+                                                                                 CREDENTIALS[2], MARKET)
+        quote = Compute_Quote(params, sigma, weighted_midpoint, kappa, inventory, 0.0)
+        main.requote.Quoted(weighted_midpoint, quote['spread'], inventory, sigma)
+        main.Place_Order(CREDENTIALS[0], CREDENTIALS[1], CREDENTIALS[2], quote['order_trade_amount'],
+                         quote['aggressive_reserve_price'], quote['spread'], 0, params.post_only, MARKET, best_bid,
+                         best_ask, params.inventory_cutoff, quote['target_distance'])
+
+    benchmarks = [
+        ["Sigma", lambda i: main.Sigma(MARKET, 1.0)],
+        ["Reservation_Price", lambda i: Reservation_Price(3000.0 + i * 0.01, 0.3, 0.5, 12.5, 1.0, 1.0)],
+        ["Optimal_Spread", lambda i: Optimal_Spread(0.5, 12.5, 60000.0 + i)],
+        ["Compute_Quote", lambda i: Compute_Quote(params, 12.5, 3000.0 + i * 0.01, 60000.0, 0.25, 0.0)],
+        ["Order_Sides", lambda i: Order_Sides(3000.0, 0.5, True, 2999.95, 3000.05, 0.0, 0.1)],
+        ["Kappa (stream)", stream_kappa],
+        ["Kappa (REST)", rest_kappa],
+        ["GetHistoricalPrices", candles],
+        ["Get_Positions", positions],
+        ["Place_Order (adapter)", place_order],
+        ["Loop Iteration (adapter)", iteration]
+    ]
+
+    results = {}
+    try:
+        for name, fn in benchmarks:
+            results[name] = Measure(fn)
+    finally:
+        main.log.Close()
+        asyncio.run_coroutine_threadsafe(exchange.Stop(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+    return results
+
+
+def Speed(result: dict, base: dict) -> float:
+    if not ('calibration_us' in base):
+        return 1.0
+    return result['calibration_us'] / base['calibration_us']
+
+
+def Compare(results: dict, baseline: dict, threshold: float = REGRESSION) -> list:
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        speed = Speed(result, base)
+        # A regression has to clear the threshold over the speed-scaled baseline and the noise both runs
+        # measured across their rounds.
+        noise = max(NOISE_FLOOR_US, result['p50_spread_us'] + base.get('p50_spread_us', 0.0) * speed)
+        for key in ['p50_us']:
+            expected = base[key] * speed
+            if result[key] > expected * (1 + threshold) and result[key] - expected > noise:
+                regressions.append([name, key, expected, result[key]])
+    return regressions
+
+
+if __name__ == '__main__':
+    if "--recording" in sys.argv:
+        books = Load_Books(sys.argv[sys.argv.index("--recording") + 1])
+    else:
+        books = Synthetic_Books(ITERATIONS + WARMUP)
+
+    results = Run(books)
+    baseline = {}
+    if os.path.exists(BASELINE):
+        with open(BASELINE) as f:
+            baseline = json.load(f)
+
+    print("Benchmark                 p50 (us)    Spread (us)  p99 (us)    max (us)    Alloc B/call  Retained/call  "
+          "Speed  Baseline p50")
+    for name, result in results.items():
+        base = baseline.get(name)
+        print(name.ljust(25), ("%.2f" % result['p50_us']).ljust(11), ("%.2f" % result['p50_spread_us']).ljust(12),
+              ("%.2f" % result['p99_us']).ljust(11), ("%.2f" % result['max_us']).ljust(11),
+              ("%.0f" % result['allocated_bytes_per_call']).ljust(13), ("%.2f" % result['retained_blocks_per_call']).ljust(14),
+              ("%.2f" % Speed(result, base) if base is not None else "-").ljust(6),
+              "%.2f" % base['p50_us'] if base is not None else "-")
+
+    # Timings only compare on the machine that recorded them, so the baseline is local and untracked:
+    # the first run records it and --save replaces it.
+    if "--save" in sys.argv or len(baseline) == 0:
+        with open(BASELINE, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print("Baseline Recorded To ", BASELINE)
+        exit(0)
+
+    threshold = REGRESSION
+    if "--threshold" in sys.argv:
+        threshold = float(sys.argv[sys.argv.index("--threshold") + 1])
+    regressions = Compare(results, baseline, threshold)
+    for name, key, before, after in regressions:
+        print("Regression ", name, key, "%.2f -> %.2f" % (before, after))
+    exit(1 if len(regressions) > 0 else 0)
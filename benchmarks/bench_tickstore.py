@@ -0,0 +1,65 @@
+import os
+import sys
+import random
+import shutil
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from tickstore import TickWriter, TickReader
+
+
+RECORDS = 200000
+
+
+def Make_Records(count: int) -> list:
+    records = []
+    timestamp = 1630000000.0
+    i = 0
+    while i < count:
+        timestamp = timestamp + random.random() * 0.01
+        records.append([timestamp, random.randint(0, 1), 3000.0 + random.randint(-500, 500) * 0.1,
+                        random.choice([0.0, 0.5, 1.0, 2.5]), 0])
+        i += 1
+    return records
+
+
+def Run(directory: str, records: list, compress: bool) -> list:
+    path = os.path.join(directory, "compressed" if compress else "raw")
+
+    def write():
+        for name in [path + ".dat", path + ".idx"]:
+            if os.path.exists(name):
+                os.remove(name)
+        writer = TickWriter(path, 'book', compress=compress)
+        for record in records:
+            writer.Append(*record)
+        writer.Close()
+
+    def scan():
+        reader = TickReader(path, 'book')
+        total = 0.0
+        for chunk in reader.Chunks():
+            total = total + float(chunk['size'].sum())
+        reader.Close()
+        return total
+
+    write_time = min(timeit.repeat(write, number=1, repeat=3)) / len(records)
+    scan_time = min(timeit.repeat(scan, number=1, repeat=3))
+    size = os.path.getsize(path + ".dat") + os.path.getsize(path + ".idx")
+    return [write_time, len(records) / scan_time, size]
+
+
+if __name__ == '__main__':
+    random.seed(7)
+    records = Make_Records(RECORDS)
+    directory = tempfile.mkdtemp()
+    try:
+        print("Mode         Write (us/record)   Scan (records/s)   Bytes/record")
+        for compress in [False, True]:
+            write_time, scan_rate, size = Run(directory, records, compress)
+            print(("zlib" if compress else "raw").ljust(12), ("%.2f" % (write_time * 1e6)).ljust(19),
+                  ("%.0f" % scan_rate).ljust(18), "%.1f" % (size / len(records)))
+    finally:
+        shutil.rmtree(directory)
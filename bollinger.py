@@ -0,0 +1,122 @@
+import math
+import time
+from array import array
+
+
+RESUM_INTERVAL = 4096
+
+
+class RollingBands:
+    # Same definition as TA-Lib BBANDS with an SMA middle band: population standard deviation
+    # over the last `timeperiod` closes.
+    def __init__(self, timeperiod: int, nbdevup: float, nbdevdn: float):
+        self.timeperiod = timeperiod
+        self.nbdevup = nbdevup
+        self.nbdevdn = nbdevdn
+        self.closes = array('d', [0.0] * timeperiod)
+        self.head = 0
+        self.count = 0
+        self.sum = 0.0
+        self.sum_sq = 0.0
+        self.updates = 0
+
+    def Update(self, close: float):
+        if self.count == self.timeperiod:
+            old = self.closes[self.head]
+            self.sum = self.sum - old
+            self.sum_sq = self.sum_sq - old * old
+        else:
+            self.count += 1
+        self.closes[self.head] = close
+        self.head = (self.head + 1) % self.timeperiod
+        self.sum = self.sum + close
+        self.sum_sq = self.sum_sq + close * close
+
+        self.updates += 1
+        if self.updates >= RESUM_INTERVAL:
+            self.Resum()
+
+    def Resum(self):
+        total = 0.0
+        total_sq = 0.0
+        i = 0
+        while i < self.count:
+            close = self.closes[(self.head - 1 - i) % self.timeperiod]
+            total = total + close
+            total_sq = total_sq + close * close
+            i += 1
+        self.sum = total
+        self.sum_sq = total_sq
+        self.updates = 0
+
+    def Ready(self) -> bool:
+        return self.count == self.timeperiod
+
+    def Bands(self, pending: float = None) -> list:
+        # `pending` is the close of the bar still forming; it stands in for the oldest bar without
+        # being committed, matching an indicator that includes the live candle.
+        total = self.sum
+        total_sq = self.sum_sq
+        n = self.count
+        if pending is not None:
+            if n == self.timeperiod:
+                old = self.closes[self.head]
+                total = total - old
+                total_sq = total_sq - old * old
+            else:
+                n += 1
+            total = total + pending
+            total_sq = total_sq + pending * pending
+        if n == 0:
+            return None
+
+        mean = total / n
+        variance = total_sq / n - mean * mean
+        deviation = math.sqrt(variance) if variance > 0 else 0.0
+        return [mean - self.nbdevdn * deviation, mean, mean + self.nbdevup * deviation]
+
+
+class BollingerEngine:
+    def __init__(self, interval: int):
+        self.interval = interval
+        self.bands = {}
+        self.bar_start = None
+        self.close = 0.0
+
+    def Add(self, timeperiod: int, nbdevup: float, nbdevdn: float) -> tuple:
+        key = (timeperiod, nbdevup, nbdevdn)
+        if not (key in self.bands):
+            self.bands[key] = RollingBands(timeperiod, nbdevup, nbdevdn)
+        return key
+
+    def Seed(self, candles: list):
+        now = time.time()
+        for candle in candles:
+            start = candle['time'] / 1000.0
+            if start + self.interval > now:
+                # Still forming: keep it as the pending bar so the stream completes it.
+                self.bar_start = int(start // self.interval) * self.interval
+                self.close = candle['close']
+            else:
+                self.AddBar(candle['close'])
+
+    def AddBar(self, close: float):
+        for bands in self.bands.values():
+            bands.Update(close)
+
+    def Update(self, timestamp: float, price: float):
+        if price <= 0:
+            return
+        bucket = int(timestamp // self.interval) * self.interval
+        if self.bar_start is not None and bucket > self.bar_start:
+            self.AddBar(self.close)
+        if self.bar_start is None or bucket >= self.bar_start:
+            self.bar_start = bucket
+            self.close = price
+
+    def Ready(self, key: tuple) -> bool:
+        return self.bands[key].Ready()
+
+    def Bands(self, key: tuple, live: bool = True) -> list:
+        pending = self.close if live and self.bar_start is not None else None
+        return self.bands[key].Bands(pending)
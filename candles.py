@@ -0,0 +1,176 @@
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+CANDLE_DIRECTORY = "candles"
+CACHE_CAPACITY = 32
+PAGE_LIMIT = 1500
+BACKFILL_WORKERS = 4
+
+
+def Missing_Ranges(covered: list, start: int, end: int, resolution: int) -> list:
+    missing = []
+    cursor = start
+    for lo, hi in covered:
+        if hi < cursor:
+            continue
+        if lo > end:
+            break
+        if lo > cursor:
+            missing.append([cursor, lo - resolution])
+        cursor = max(cursor, hi + resolution)
+        if cursor > end:
+            break
+    if cursor <= end:
+        missing.append([cursor, end])
+    return missing
+
+
+def Merge_Ranges(covered: list, lo: int, hi: int, resolution: int) -> list:
+    merged = []
+    for a, b in sorted(covered + [[lo, hi]]):
+        if len(merged) > 0 and a <= merged[-1][1] + resolution:
+            merged[-1][1] = max(merged[-1][1], b)
+        else:
+            merged.append([a, b])
+    return merged
+
+
+class CandleSeries:
+    def __init__(self, candles: dict = None, covered: list = None):
+        self.candles = candles if candles is not None else {}
+        self.covered = covered if covered is not None else []
+        self.dirty = False
+
+
+class CandleCache:
+    def __init__(self, client, directory: str = CANDLE_DIRECTORY, capacity: int = CACHE_CAPACITY,
+                 page_limit: int = PAGE_LIMIT, workers: int = BACKFILL_WORKERS):
+        self.client = client
+        self.directory = directory
+        self.capacity = capacity
+        self.page_limit = page_limit
+        self.workers = workers
+        self.lock = threading.Lock()
+        self.series = OrderedDict()
+        self.fetches = 0
+        self.hits = 0
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, market: str, resolution: int) -> str:
+        return os.path.join(self.directory, market.replace("/", "_") + "." + str(resolution) + ".json")
+
+    def _series(self, market: str, resolution: int) -> CandleSeries:
+        key = (market, resolution)
+        series = self.series.get(key)
+        if series is not None:
+            self.series.move_to_end(key)
+            return series
+
+        series = CandleSeries()
+        if self.directory is not None and os.path.exists(self._path(market, resolution)):
+            try:
+                with open(self._path(market, resolution)) as f:
+                    stored = json.load(f)
+                series = CandleSeries(dict((candle['time'] // 1000, candle) for candle in stored['candles']),
+                                      stored['covered'])
+            except (ValueError, KeyError):
+                print("Error Loading Candle Cache ", market, resolution)
+
+        self.series[key] = series
+        while len(self.series) > self.capacity:
+            evicted_key, evicted = self.series.popitem(last=False)
+            self._save(evicted_key, evicted)
+        return series
+
+    def _save(self, key: tuple, series: CandleSeries):
+        if self.directory is None or not series.dirty:
+            return
+        path = self._path(key[0], key[1])
+        stored = {'candles': [series.candles[t] for t in sorted(series.candles)], 'covered': series.covered}
+        with open(path + ".tmp", "w") as f:
+            json.dump(stored, f)
+        os.replace(path + ".tmp", path)
+        series.dirty = False
+
+    def _fetch(self, job: list) -> list:
+        market, resolution, lo, hi = job
+        resp, err = self.client.GetHistoricalPrices(market, resolution, self.page_limit, lo, hi)
+        if err is not None or resp is None or not ('result' in resp):
+            return None
+        return resp['result']
+
+    def _pages(self, market: str, resolution: int, missing: list) -> list:
+        jobs = []
+        span = self.page_limit * resolution
+        for lo, hi in missing:
+            page = lo
+            while page <= hi:
+                jobs.append([market, resolution, page, min(hi, page + span - resolution)])
+                page = page + span
+        return jobs
+
+    def Get(self, market: str, resolution: int, start: int, end: int) -> list:
+        start = start - start % resolution
+        end = end - end % resolution
+        # Only closed buckets are marked covered; the open one is refetched on every call.
+        closed = int(time.time()) // resolution * resolution - resolution
+
+        with self.lock:
+            series = self._series(market, resolution)
+            missing = Missing_Ranges(series.covered, start, end, resolution)
+
+        if len(missing) == 0:
+            self.hits += 1
+        else:
+            jobs = self._pages(market, resolution, missing)
+            if len(jobs) == 1:
+                pages = [self._fetch(jobs[0])]
+            else:
+                with ThreadPoolExecutor(min(self.workers, len(jobs))) as pool:
+                    pages = list(pool.map(self._fetch, jobs))
+            self.fetches += len(jobs)
+
+            with self.lock:
+                series = self._series(market, resolution)
+                for job, page in zip(jobs, pages):
+                    if page is None:
+                        continue
+                    for candle in page:
+                        series.candles[candle['time'] // 1000] = candle
+                    hi = min(job[3], closed)
+                    if hi >= job[2]:
+                        series.covered = Merge_Ranges(series.covered, job[2], hi, resolution)
+                series.dirty = True
+
+        with self.lock:
+            candles = series.candles
+            return [candles[t] for t in range(start, end + 1, resolution) if t in candles]
+
+    def Flush(self):
+        with self.lock:
+            for key, series in self.series.items():
+                self._save(key, series)
+
+    def Stats(self) -> dict:
+        with self.lock:
+            return {'fetches': self.fetches, 'hits': self.hits, 'series': len(self.series)}
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def Get_Cache(client, directory: str = CANDLE_DIRECTORY) -> CandleCache:
+    key = (id(client), directory)
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = CandleCache(client, directory)
+            _caches[key] = cache
+        return cache
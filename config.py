@@ -0,0 +1,172 @@
+import os
+import json
+import threading
+from strategy import StrategyParams
+
+
+TICKERS = ["ETH-PERP", "BTC-PERP", "UNI-PERP", "LINK-PERP", "MKR-PERP", "DOGE-PERP"]
+VOLATILITY_INTERVALS = ["15", "60", "300"]
+RELOAD_INTERVAL = 2.0
+# Changing these means resubscribing feeds and reseeding vol, so they are not hot-reloadable.
+RESTART_FIELDS = ["market", "volatility_interval", "order_book_depth"]
+
+PARAM_TYPES = [
+    ['market', str], ['stake_price', float], ['upper_threshold', float], ['lower_threshold', float],
+    ['position_size', float], ['multiplier', float], ['volatility_interval', str], ['order_book_depth', int],
+    ['gamma', float], ['max_trade_amount', float], ['order_time', float], ['minimum_spread', float],
+    ['price_aggressor', float], ['post_only', bool], ['inventory_cutoff', float]
+]
+
+
+class ConfigError(Exception):
+    pass
+
+
+def Validate(params: StrategyParams) -> list:
+    errors = []
+    if not (params.market in TICKERS):
+        errors.append("Ticker Not Defined Within Data Structure: " + str(params.market))
+    if params.upper_threshold < params.stake_price:
+        errors.append("Upper Threshold Is Below Stake Price")
+    if params.lower_threshold > params.stake_price:
+        errors.append("Lower Threshold Is Above Stake Price")
+    if not (params.volatility_interval in VOLATILITY_INTERVALS):
+        errors.append("Volatility Interval Must Be One Of " + ", ".join(VOLATILITY_INTERVALS))
+    if params.order_book_depth < 10:
+        errors.append("Order Book Depth Too Small")
+    if params.gamma >= 1 or params.gamma <= 0:
+        errors.append("Gamma Must Exist Within The Set (0, 1)")
+    if params.max_trade_amount < 0.001:
+        errors.append("Max Trade Amount Is Incorrect")
+    if params.order_time <= 0:
+        errors.append("Order Refresh Time Must Be Positive")
+    return errors
+
+
+def Parse_Params(values: dict) -> StrategyParams:
+    if not isinstance(values, dict):
+        raise ConfigError("Each Market Must Be An Object: " + repr(values))
+    args = []
+    for name, kind in PARAM_TYPES:
+        if not (name in values):
+            raise ConfigError("Missing Parameter: " + name)
+        value = values[name]
+        try:
+            if kind is bool and not isinstance(value, bool):
+                if not (value in [0, 1]):
+                    raise ValueError(value)
+                value = value == 1
+            elif kind is str:
+                value = str(value)
+            else:
+                value = kind(value)
+        except (TypeError, ValueError):
+            raise ConfigError("Invalid Value For " + name + ": " + repr(values[name]))
+        args.append(value)
+
+    params = StrategyParams(*args)
+    errors = Validate(params)
+    if len(errors) > 0:
+        raise ConfigError(params.market + ": " + "; ".join(errors))
+    return params
+
+
+def Parse_Account(values: dict) -> dict:
+    if not isinstance(values, dict):
+        raise ConfigError("Config Must Be An Object")
+    for name in ["api_key", "api_secret", "subaccount", "markets"]:
+        if not (name in values):
+            raise ConfigError("Missing Parameter: " + name)
+    if not isinstance(values['markets'], list):
+        raise ConfigError("Markets Must Be A List")
+    markets = [Parse_Params(market) for market in values['markets']]
+    if len(markets) == 0:
+        raise ConfigError("No Markets Configured For " + values['subaccount'])
+
+    bollinger = values.get('bollinger')
+    if bollinger is not None:
+        try:
+            bollinger = [int(bollinger['timeperiod']), float(bollinger['nbdevup']), float(bollinger['nbdevdn'])]
+        except (KeyError, TypeError, ValueError):
+            raise ConfigError("Invalid Bollinger Settings")
+        if bollinger[0] < 2:
+            raise ConfigError("Bollinger Timeperiod Must Be At Least 2")
+
+    return {
+        'api_key': values['api_key'],
+        'api_secret': values['api_secret'],
+        'subaccount': values['subaccount'],
+        'markets': markets,
+        'bollinger': bollinger
+    }
+
+
+def Load_Config(path: str) -> dict:
+    try:
+        with open(path) as f:
+            values = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ConfigError("Cannot Read Config " + path + ": " + str(e))
+    return Parse_Account(values)
+
+
+class ConfigWatcher:
+    # Polls the file and applies validated strategy parameters in place, so the running loop picks
+    # them up on its next quote. An invalid file is reported and the previous parameters stay live.
+    def __init__(self, path: str, markets: list, interval: float = RELOAD_INTERVAL, listener=None):
+        self.path = path
+        self.markets = dict((params.market, params) for params in markets)
+        self.interval = interval
+        self.listener = listener
+        self.mtime = self._mtime()
+        self.reloads = 0
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def _mtime(self) -> float:
+        try:
+            return os.stat(self.path).st_mtime
+        except OSError:
+            return 0.0
+
+    def Start(self):
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def Stop(self):
+        self.stopped.set()
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            mtime = self._mtime()
+            if mtime != self.mtime:
+                self.mtime = mtime
+                self.Reload()
+
+    def Reload(self) -> list:
+        try:
+            config = Load_Config(self.path)
+        except ConfigError as e:
+            print("Config Reload Rejected ", e)
+            return []
+
+        changed = []
+        for params in config['markets']:
+            live = self.markets.get(params.market)
+            if live is None:
+                print("Config Reload Ignored New Market ", params.market, ", Restart Required")
+                continue
+            fixed = [name for name in RESTART_FIELDS if getattr(live, name) != getattr(params, name)]
+            if len(fixed) > 0:
+                print("Config Reload Ignored ", params.market, fixed, ", Restart Required")
+                for name in fixed:
+                    setattr(params, name, getattr(live, name))
+            if live.__dict__ != params.__dict__:
+                # One dict.update so a reader never sees half of the new parameters.
+                live.__dict__.update(params.__dict__)
+                changed.append(params.market)
+
+        self.reloads += 1
+        if self.listener is not None and len(changed) > 0:
+            self.listener(changed)
+        return changed
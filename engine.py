@@ -0,0 +1,227 @@
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from ftx_async import AsyncFtxClient, BlockingClient
+from ftx_client import URL
+from feed import PrivateFeed
+from account import AccountState
+from orders import OrderManager
+from requote import RequoteScheduler
+from candles import Get_Cache
+from orderbook import OrderBook
+from ratelimit import FairLimiter, RATE_LIMIT, RATE_BURST
+from volatility import RollingVolatility
+from strategy import StrategyParams, Compute_Quote, Order_Sides
+from timing import timings
+
+
+VOL_ESTIMATOR = "parkinson"
+VOL_WINDOW = 30
+# How often each market samples its book and checks its requote triggers between quotes.
+REQUOTE_POLL = 0.01
+STALE_RETRY = 1.0
+
+
+class MarketState:
+    def __init__(self, params: StrategyParams, manager: OrderManager):
+        self.params = params
+        self.manager = manager
+        self.requote = RequoteScheduler()
+        self.interval = int(params.volatility_interval)
+        self.vol = RollingVolatility(self.interval, VOL_WINDOW)
+        self.last_vol = 0.0
+        self.inventory_target = 0.0
+        self.last_quote = None
+        self.stale = False
+        self.cycles = 0
+        self.quotes = 0
+        self.tick_received = 0
+
+
+class TradingEngine:
+    # The sync loop's pieces, one task per market: OrderManager amends the resting quotes, RequoteScheduler
+    # decides when to requote, AccountState carries the position and the book stream feeds the volatility.
+    # OrderManager and CandleCache block, so they run on executor threads through a BlockingClient.
+    def __init__(self, client: AsyncFtxClient, markets: list, feed=None, account: AccountState = None):
+        self.client = client
+        self.feed = feed
+        self.account = account if account is not None else AccountState()
+        self.orders = BlockingClient(client)
+        self.pool = None
+        self.markets = {}
+        for params in markets:
+            self.markets[params.market] = MarketState(params, OrderManager(self.orders, params.market, self.account))
+        self.running = False
+        self.listeners = []
+        self.account.listeners.append(self._on_fill)
+
+    def _on_fill(self, fill: dict, position: float):
+        state = self.markets.get(fill['market'])
+        if state is not None:
+            state.requote.OnInventory(position)
+
+    async def _blocking(self, call, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.pool, call, *args)
+
+    def _seed(self, state: MarketState):
+        now = int(time.time())
+        cache = Get_Cache(self.orders)
+        candles = cache.Get(state.params.market, state.interval, now - state.interval * VOL_WINDOW, now)
+        cache.Flush()
+        # The forming bucket is left to the stream.
+        state.vol.Seed([candle for candle in candles if candle['time'] + state.interval * 1000 <= now * 1000])
+
+    def Observe(self, state: MarketState, stats: list):
+        state.vol.Update(time.time(), stats[0])
+        state.requote.OnPrice(stats[1])
+        if state.vol.Ready(VOL_ESTIMATOR):
+            state.requote.OnSigma(state.vol.Sigma(VOL_ESTIMATOR))
+
+    def Sample(self, state: MarketState) -> list:
+        # Polled rather than called back, so the in-process feed and the supervisor's shared books
+        # drive the engine the same way.
+        if self.feed is None:
+            return None
+        stats = self.feed.Stats(state.params.market, state.params.order_book_depth)
+        if stats is not None:
+            self.Observe(state, stats)
+        return stats
+
+    def Sigma(self, state: MarketState) -> float:
+        if not state.vol.Ready(VOL_ESTIMATOR):
+            return state.last_vol
+        sigma = state.vol.Sigma(VOL_ESTIMATOR)
+        if sigma == 0:
+            return state.last_vol
+        return sigma
+
+    async def Fetch_Book(self, state: MarketState) -> list:
+        stage = time.perf_counter_ns()
+        depth = state.params.order_book_depth
+        stats = self.Sample(state)
+        if stats is not None:
+            state.tick_received = self.feed.Received(state.params.market)
+            timings.Since("book", stage)
+            return stats
+
+        response, err = await self.client.GetOrderBook(state.params.market, depth)
+        if err is not None or response is None or not ('result' in response):
+            return None
+        book = OrderBook(state.params.market, depth)
+        book.Snapshot(response['result'])
+        state.tick_received = timings.Since("book", stage)
+        stats = book.Stats(depth)
+        if stats is not None:
+            self.Observe(state, stats)
+        return stats
+
+    async def Fetch_Position(self, state: MarketState) -> list:
+        stage = time.perf_counter_ns()
+        if not self.account.Live():
+            positions, err = await self.client.GetPositions(True)
+            if err is not None:
+                return None
+            self.account.Reconcile(positions)
+        timings.Since("positions", stage)
+        return self.account.Details(state.params.market)
+
+    async def Quote(self, state: MarketState) -> bool:
+        params = state.params
+        book, details = await asyncio.gather(self.Fetch_Book(state), self.Fetch_Position(state))
+        sigma = self.Sigma(state)
+        if sigma == 0:
+            print("Vol Cannot Be Measured For ", params.market, ", Not Quoting")
+            return False
+        if book is None or details is None:
+            print("Market Data Unavailable For ", params.market, ", Pulling Quotes")
+            if not state.stale:
+                await self._blocking(state.manager.CancelAll)
+                state.stale = True
+            return False
+        state.stale = False
+
+        sigma = round(sigma * 100) / 100
+        state.last_vol = sigma
+        midpoint, weighted_midpoint, kappa, best_bid, best_ask = book
+        weighted_midpoint = round(weighted_midpoint * 100) / 100
+        realized_pnl, unrealized_pnl, current_inventory, entry_price = details
+
+        stage = time.perf_counter_ns()
+        quote = Compute_Quote(params, sigma, weighted_midpoint, kappa, current_inventory, state.inventory_target)
+        stage = timings.Since("quote", stage)
+        state.inventory_target = quote['inventory_target']
+        state.last_quote = quote
+
+        sides = Order_Sides(quote['aggressive_reserve_price'], quote['spread'], params.post_only, best_bid, best_ask,
+                            params.inventory_cutoff, quote['target_distance'])
+        if state.tick_received > 0:
+            timings.Record("tick_to_quote", stage - state.tick_received)
+        state.requote.Quoted(weighted_midpoint, quote['spread'], current_inventory, sigma)
+        await self._blocking(state.manager.Quote, sides, quote['order_trade_amount'], params.post_only)
+        state.quotes += 1
+        for listener in self.listeners:
+            listener(params.market, details)
+        return True
+
+    async def Wait_Requote(self, state: MarketState) -> str:
+        # order_time is read on every poll, so a hot reload applies to the quote already resting.
+        while self.running:
+            self.Sample(state)
+            reason = state.requote.Due(state.params.order_time)
+            if reason is not None:
+                return reason
+            await asyncio.sleep(REQUOTE_POLL)
+        return None
+
+    async def Run_Market(self, state: MarketState, cycles: int = None):
+        # Nothing resting from an earlier run is tracked, so start flat.
+        await self._blocking(state.manager.CancelAll)
+        await self._blocking(self._seed, state)
+        while self.running and (cycles is None or state.cycles < cycles):
+            state.cycles += 1
+            if not await self.Quote(state):
+                await asyncio.sleep(STALE_RETRY)
+                continue
+            if cycles is not None and state.cycles >= cycles:
+                break
+            await self.Wait_Requote(state)
+            await self._blocking(state.manager.Sync)
+
+    async def Run(self, cycles: int = None):
+        self.orders.loop = asyncio.get_running_loop()
+        self.pool = ThreadPoolExecutor(len(self.markets))
+        self.running = True
+        try:
+            await asyncio.gather(*[self.Run_Market(state, cycles) for state in self.markets.values()])
+        finally:
+            self.running = False
+            self.pool.shutdown()
+
+    def Stop(self):
+        self.running = False
+
+
+def Run_Engine(api: str, secret: str, subaccount: str, markets: list, feed=None, listeners: list = None,
+               url: str = URL, account: AccountState = None):
+    private_feed = None
+    if account is None:
+        # A shard has no private stream from main, so it follows its own subaccount's orders and fills.
+        account = AccountState()
+        private_feed = PrivateFeed(api, secret, subaccount, account)
+        private_feed.Start()
+
+    async def run():
+        client = AsyncFtxClient(api, secret, subaccount, url, FairLimiter(RATE_LIMIT, RATE_BURST))
+        engine = TradingEngine(client, markets, feed, account)
+        if listeners is not None:
+            engine.listeners.extend(listeners)
+        try:
+            await engine.Run()
+        finally:
+            await client.Close()
+
+    try:
+        asyncio.run(run())
+    finally:
+        if private_feed is not None:
+            private_feed.Stop()
@@ -0,0 +1,88 @@
+import sys
+import json
+import time
+import queue
+import threading
+
+
+QUEUE_CAPACITY = 8192
+BATCH_SIZE = 256
+CONSOLE_SAMPLE = 10
+
+
+class EventLog:
+    # Log() never blocks the caller: when the queue is full the newest event is dropped and counted,
+    # and the writer records a 'dropped' event once it catches up. Console echo happens on the
+    # writer thread, so a slow terminal only ever backs up this queue.
+    def __init__(self, path: str = None, capacity: int = QUEUE_CAPACITY, console: bool = True,
+                 stream=None):
+        self.path = path
+        self.console = console
+        self.stream = stream if stream is not None else sys.stdout
+        self.queue = queue.Queue(capacity)
+        self.dropped = 0
+        self.reported = 0
+        self.written = 0
+        self.file = open(path, "a") if path is not None else None
+        self.writer = threading.Thread(target=self._run, daemon=True)
+        self.writer.start()
+
+    def Log(self, event: str, fields: dict = None, echo: bool = False):
+        try:
+            self.queue.put_nowait([time.time(), event, fields, echo])
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        running = True
+        while running:
+            batch = [self.queue.get()]
+            while len(batch) < BATCH_SIZE:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            lines = []
+            console = []
+            for entry in batch:
+                if entry is None:
+                    running = False
+                    continue
+                timestamp, event, fields, echo = entry
+                record = {'ts': timestamp, 'event': event}
+                if fields is not None:
+                    record.update(fields)
+                lines.append(json.dumps(record, default=str))
+                if echo and self.console:
+                    console.append(Format(event, fields))
+
+            dropped = self.dropped
+            if dropped != self.reported:
+                lines.append(json.dumps({'ts': time.time(), 'event': 'dropped', 'count': dropped - self.reported}))
+                self.reported = dropped
+
+            if self.file is not None and len(lines) > 0:
+                self.file.write("\n".join(lines) + "\n")
+                self.file.flush()
+            if len(console) > 0:
+                self.stream.write("\n".join(console) + "\n")
+                self.stream.flush()
+            self.written += len(lines)
+
+    def Close(self):
+        self.queue.put(None)
+        self.writer.join()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def Format(event: str, fields: dict) -> str:
+    if fields is None or len(fields) == 0:
+        return event
+    lines = []
+    for key, value in fields.items():
+        lines.append(key.replace("_", " ").title() + ": " + str(value))
+    return "\n".join(lines)
+
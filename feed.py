@@ -0,0 +1,359 @@
+import sys
+import json
+import time
+import hmac
+import hashlib
+import urllib
+import asyncio
+import threading
+import aiohttp
+from aiohttp import web
+from orderbook import OrderBook, CHECKSUM_LEVELS
+from account import AccountState
+
+
+WS_URL = "wss://ftx.com/ws/"
+PING_INTERVAL = 15
+RECONNECT_DELAY = 5
+PRIVATE_CHANNELS = ['orders', 'fills']
+
+
+class MarketFeed:
+    def __init__(self, url: str = WS_URL, trades: bool = False):
+        self.url = url
+        self.trades = trades
+        self.markets = []
+        self.books = {}
+        self.listeners = []
+        self.raw_listeners = []
+        self.stale_listeners = []
+        self.received = {}
+        self.loop = None
+        self.ws = None
+        self.thread = None
+        self.lock = threading.Lock()
+        self.running = False
+
+    def Subscribe(self, market: str, depth: int = CHECKSUM_LEVELS):
+        if market in self.markets:
+            return
+        self.markets.append(market)
+        self.books[market] = OrderBook(market, depth)
+        if self.ws is not None:
+            asyncio.run_coroutine_threadsafe(self._subscribe(market), self.loop)
+
+    def AddListener(self, listener):
+        self.listeners.append(listener)
+
+    def AddRawListener(self, listener):
+        self.raw_listeners.append(listener)
+
+    def AddStaleListener(self, listener):
+        # Called with the market whenever its book stops being served: a disconnect or a rebuild.
+        self.stale_listeners.append(listener)
+
+    def Book(self, market: str) -> OrderBook:
+        book = self.books.get(market)
+        if book is None or not book.ready:
+            return None
+        return book
+
+    def Stats(self, market: str, depth: int) -> list:
+        with self.lock:
+            book = self.Book(market)
+            if book is None:
+                return None
+            return book.Stats(depth)
+
+    def WaitReady(self, market: str, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.Book(market) is not None:
+                return True
+            time.sleep(0.05)
+        return False
+
+    def Start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._thread_main, daemon=True)
+        self.thread.start()
+
+    def Stop(self):
+        self.running = False
+        if self.loop is not None and self.ws is not None:
+            asyncio.run_coroutine_threadsafe(self.ws.close(), self.loop)
+
+    def _thread_main(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(self._run())
+
+    async def _run(self):
+        async with aiohttp.ClientSession() as session:
+            while self.running:
+                try:
+                    async with session.ws_connect(self.url, heartbeat=PING_INTERVAL) as ws:
+                        self.ws = ws
+                        await self._on_connect()
+                        async for msg in ws:
+                            if msg.type != aiohttp.WSMsgType.TEXT:
+                                break
+                            await self._receive(msg.data)
+                except (aiohttp.ClientError, asyncio.TimeoutError, OSError):
+                    print("Market Feed Disconnected ", sys.exc_info()[0])
+                except Exception:
+                    print("Market Feed Error ", sys.exc_info()[0], sys.exc_info()[1])
+                finally:
+                    # Whatever ends the connection, even a thread-killing error, the books stop serving.
+                    self.ws = None
+                    self._on_disconnect()
+                if self.running:
+                    await asyncio.sleep(RECONNECT_DELAY)
+
+    async def _receive(self, raw: str):
+        data = None
+        try:
+            data = json.loads(raw)
+            for listener in self.raw_listeners:
+                listener(data)
+            await self._handle(data)
+        except (aiohttp.ClientError, asyncio.TimeoutError, OSError):
+            raise
+        except Exception:
+            # A bad frame, an unexpected payload or a failing listener costs one message, not the feed.
+            print("Market Feed Bad Message ", sys.exc_info()[0], sys.exc_info()[1])
+            await self._recover(data)
+
+    async def _recover(self, msg):
+        # The book the message was for may now be behind the exchange, so rebuild it; rebuild them all
+        # when the message can't be attributed.
+        market = msg.get('market') if isinstance(msg, dict) else None
+        markets = [market] if market in self.books else list(self.markets)
+        for market in markets:
+            with self.lock:
+                self.books[market].ready = False
+            await self._resync(market)
+
+    async def _on_connect(self):
+        for market in list(self.markets):
+            await self._subscribe(market)
+
+    def _on_disconnect(self):
+        with self.lock:
+            for book in self.books.values():
+                book.ready = False
+        for market in list(self.markets):
+            self._stale(market)
+
+    def _stale(self, market: str):
+        for listener in self.stale_listeners:
+            listener(market)
+
+    async def _subscribe(self, market: str):
+        await self.ws.send_json({'op': 'subscribe', 'channel': 'orderbook', 'market': market})
+        if self.trades:
+            await self.ws.send_json({'op': 'subscribe', 'channel': 'trades', 'market': market})
+
+    async def _resync(self, market: str):
+        print("Rebuilding Order Book ", market)
+        self._stale(market)
+        await self.ws.send_json({'op': 'unsubscribe', 'channel': 'orderbook', 'market': market})
+        await self.ws.send_json({'op': 'subscribe', 'channel': 'orderbook', 'market': market})
+
+    async def _handle(self, msg: dict):
+        if msg.get('channel') != 'orderbook':
+            if msg.get('type') == 'error':
+                print("Market Feed Error ", msg.get('msg'))
+            return
+
+        book = self.books.get(msg.get('market'))
+        if book is None:
+            return
+
+        with self.lock:
+            if msg.get('type') == 'partial':
+                ok = book.Snapshot(msg['data'])
+            elif msg.get('type') == 'update':
+                if not book.ready:
+                    return
+                ok = book.Update(msg['data'])
+            else:
+                return
+
+        if not ok:
+            await self._resync(book.market)
+            return
+
+        self.received[book.market] = time.perf_counter_ns()
+        for listener in self.listeners:
+            listener(book)
+
+    def Received(self, market: str) -> int:
+        return self.received.get(market, 0)
+
+
+class PrivateFeed(MarketFeed):
+    def __init__(self, api: str, secret: str, subaccount: str, account: AccountState, url: str = WS_URL):
+        MarketFeed.__init__(self, url)
+        self.api = api
+        self.secret = secret
+        self.subaccount = subaccount
+        self.account = account
+        self.subscribed = set()
+
+    async def _on_connect(self):
+        ts = int(time.time() * 1000)
+        args = {
+            'key': self.api,
+            'sign': hmac.new(self.secret.encode(), (str(ts) + "websocket_login").encode(), hashlib.sha256).hexdigest(),
+            'time': ts
+        }
+        if self.subaccount != '':
+            args['subaccount'] = urllib.parse.unquote(self.subaccount)
+        await self.ws.send_json({'op': 'login', 'args': args})
+        await self.ws.send_json({'op': 'subscribe', 'channel': 'orders'})
+        await self.ws.send_json({'op': 'subscribe', 'channel': 'fills'})
+
+    def _on_disconnect(self):
+        self.subscribed = set()
+        self.account.connected = False
+
+    async def _recover(self, msg):
+        # An order or fill update may have been lost, so stop trusting the stream until REST reconciles.
+        with self.account.lock:
+            self.account.reconciled = 0.0
+
+    async def _handle(self, msg: dict):
+        if msg.get('type') == 'error':
+            # A failed login or subscription: nothing more arrives, so the stream can't be trusted.
+            print("Private Feed Error ", msg.get('msg'))
+            self.subscribed = set()
+            self.account.connected = False
+            return
+        if msg.get('type') == 'subscribed' and msg.get('channel') in PRIVATE_CHANNELS:
+            # Connected only once the exchange has accepted the login and both channels are live.
+            self.subscribed.add(msg['channel'])
+            self.account.connected = len(self.subscribed) == len(PRIVATE_CHANNELS)
+            return
+        if msg.get('type') != 'update':
+            return
+        if msg.get('channel') == 'orders':
+            self.account.OnOrder(msg['data'])
+        elif msg.get('channel') == 'fills':
+            self.account.OnFill(msg['data'])
+        else:
+            return
+
+        for listener in self.listeners:
+            listener(msg)
+
+
+class FeedServer:
+    def __init__(self, messages: list, interval: float = 0.0):
+        self.messages = messages
+        self.interval = interval
+        self.books = {}
+        self.clients = []
+        self.connected = asyncio.Event()
+        self.runner = None
+
+    @staticmethod
+    def Load(path: str) -> list:
+        messages = []
+        with open(path) as f:
+            for line in f:
+                line = line.strip()
+                if line != "":
+                    messages.append(json.loads(line))
+        return messages
+
+    async def Start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        app = web.Application()
+        app.router.add_get('/ws/', self._websocket)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        asyncio.ensure_future(self._replay())
+        return "ws://" + host + ":" + str(port) + "/ws/"
+
+    async def Stop(self):
+        if self.runner is not None:
+            await self.runner.cleanup()
+
+    async def _replay(self):
+        await self.connected.wait()
+        for msg in self.messages:
+            market = msg['market']
+            book = self.books.get(market)
+            if book is None:
+                book = OrderBook(market)
+                self.books[market] = book
+
+            if msg.get('channel') != 'orderbook':
+                pass
+            elif msg['type'] == 'partial':
+                book.Snapshot(msg['data'])
+            elif book.ready:
+                book.Apply(msg['data'])
+            else:
+                continue
+
+            targets = [ws for ws, markets in self.clients if market in markets and not ws.closed]
+            for ws in targets:
+                await ws.send_json(msg)
+            if self.interval > 0:
+                await asyncio.sleep(self.interval)
+            else:
+                await asyncio.sleep(0)
+
+    async def _websocket(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        markets = set()
+        self.clients.append((ws, markets))
+        self.connected.set()
+        async for msg in ws:
+            if msg.type != aiohttp.WSMsgType.TEXT:
+                break
+            req = json.loads(msg.data)
+            market = req.get('market')
+            if req.get('channel') in PRIVATE_CHANNELS:
+                market = req.get('channel')
+            if req.get('op') == 'subscribe' and market in PRIVATE_CHANNELS:
+                markets.add(market)
+                await ws.send_json({'type': 'subscribed', 'channel': market})
+            elif req.get('op') == 'subscribe' and req.get('channel') == 'trades':
+                markets.add(market)
+                await ws.send_json({'type': 'subscribed', 'channel': 'trades', 'market': market})
+            elif req.get('op') == 'subscribe':
+                markets.add(market)
+                await ws.send_json({'type': 'subscribed', 'channel': 'orderbook', 'market': market})
+                book = self.books.get(market)
+                if book is not None and book.ready:
+                    await ws.send_json({'channel': 'orderbook', 'market': market, 'type': 'partial',
+                                        'data': book.Partial()})
+            elif req.get('op') == 'unsubscribe':
+                markets.discard(market)
+                await ws.send_json({'type': 'unsubscribed', 'channel': 'orderbook', 'market': market})
+            elif req.get('op') == 'ping':
+                await ws.send_json({'type': 'pong'})
+        self.clients.remove((ws, markets))
+        return ws
+
+
+if __name__ == '__main__':
+    async def serve(path: str, port: int, interval: float):
+        server = FeedServer(FeedServer.Load(path), interval)
+        url = await server.Start(port=port)
+        print("Replaying ", path, " On ", url)
+        while True:
+            await asyncio.sleep(3600)
+
+    if len(sys.argv) < 2:
+        print("Usage: python feed.py <recorded.jsonl> [port] [interval]")
+        exit(0)
+    replay_port = int(sys.argv[2]) if len(sys.argv) > 2 else 8765
+    replay_interval = float(sys.argv[3]) if len(sys.argv) > 3 else 0.01
+    asyncio.run(serve(sys.argv[1], replay_port, replay_interval))
@@ -0,0 +1,125 @@
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+
+FETCH_TIMEOUT = 2.0
+FETCH_RETRIES = 3
+# Cap on one Fetch across all attempts and backoff: past it the caller's stale path takes over.
+FETCH_DEADLINE = 1.5
+BACKOFF_BASE = 0.1
+BACKOFF_MAX = 2.0
+HEDGE_AFTER = 0.3
+HEDGE_WORKERS = 8
+BREAKER_FAILURES = 3
+BREAKER_RESET = 10.0
+
+
+def Backoff_Delay(attempt: int, base: float = BACKOFF_BASE, cap: float = BACKOFF_MAX) -> float:
+    # Full jitter: uniform over [0, min(cap, base * 2^attempt)].
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class CircuitBreaker:
+    def __init__(self, failures: int = BREAKER_FAILURES, reset: float = BREAKER_RESET):
+        self.failures = failures
+        self.reset = reset
+        self.lock = threading.Lock()
+        self.count = 0
+        self.opened = None
+        self.trips = 0
+
+    def Allow(self) -> bool:
+        with self.lock:
+            if self.opened is None:
+                return True
+            # Half-open: after `reset` seconds one probe is let through; a failure re-opens.
+            return time.monotonic() - self.opened >= self.reset
+
+    def Success(self):
+        with self.lock:
+            self.count = 0
+            self.opened = None
+
+    def Failure(self):
+        with self.lock:
+            self.count += 1
+            if self.count >= self.failures:
+                if self.opened is None:
+                    self.trips += 1
+                self.opened = time.monotonic()
+
+    def Open(self) -> bool:
+        with self.lock:
+            return self.opened is not None
+
+
+class ResilientFetcher:
+    def __init__(self, request, parse, timeout: float = FETCH_TIMEOUT, retries: int = FETCH_RETRIES,
+                 hedge_after: float = HEDGE_AFTER, breaker: CircuitBreaker = None, deadline: float = FETCH_DEADLINE):
+        self.request = request
+        self.parse = parse
+        self.timeout = timeout
+        self.deadline = deadline
+        self.retries = retries
+        self.hedge_after = hedge_after
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+        self.pool = ThreadPoolExecutor(HEDGE_WORKERS)
+        self.stats = {'requests': 0, 'hedges': 0, 'retries': 0, 'failures': 0, 'rejected': 0}
+
+    def _call(self, timeout: float, args: tuple):
+        resp, err = self.request(timeout, *args)
+        if err is not None or resp is None:
+            return None
+        return self.parse(resp, *args)
+
+    def _attempt(self, timeout: float, args: tuple):
+        deadline = time.monotonic() + timeout
+        pending = set([self.pool.submit(self._call, timeout, args)])
+        self.stats['requests'] += 1
+        hedged = self.hedge_after is None or self.hedge_after <= 0
+
+        while len(pending) > 0:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            window = remaining if hedged else min(remaining, self.hedge_after)
+            done, pending = wait(pending, window, FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                if result is not None:
+                    return result
+            if not hedged:
+                # The first request is slow or came back unusable: race a duplicate against it.
+                hedged = True
+                pending.add(self.pool.submit(self._call, max(0.0, deadline - time.monotonic()), args))
+                self.stats['hedges'] += 1
+        return None
+
+    def Fetch(self, *args):
+        if not self.breaker.Allow():
+            self.stats['rejected'] += 1
+            return None
+
+        deadline = time.monotonic() + self.deadline
+        attempt = 0
+        while attempt <= self.retries:
+            if attempt > 0:
+                delay = Backoff_Delay(attempt - 1)
+                if time.monotonic() + delay >= deadline:
+                    break
+                self.stats['retries'] += 1
+                time.sleep(delay)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            result = self._attempt(min(self.timeout, remaining), args)
+            if result is not None:
+                self.breaker.Success()
+                return result
+            attempt += 1
+
+        self.stats['failures'] += 1
+        self.breaker.Failure()
+        return None
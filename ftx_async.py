@@ -0,0 +1,157 @@
+import sys
+import json
+import time
+import asyncio
+import urllib
+import aiohttp
+from ftx_client import URL, Endpoint, Signer, latency, RATE_LIMIT_RETRIES
+from ratelimit import FairLimiter, Request_Class, BACKOFF_SECONDS
+from orders import ORDER_NOT_FOUND
+
+
+POOL_LIMIT = 16
+REQUEST_TIMEOUT = 10
+
+
+def Request_Error(method: str, path: str, status: int, result) -> str:
+    # FTX reports failures as {"success": false, "error": ...}; a closed or unknown order maps to
+    # ORDER_NOT_FOUND as it does for the ccxt client.
+    error = result.get('error') if isinstance(result, dict) else None
+    if error is not None and ("not found" in error.lower() or "already closed" in error.lower()):
+        return ORDER_NOT_FOUND
+    print("Error ", method, path, status, error)
+    if status >= 500:
+        return "server error " + str(status)
+    return "error"
+
+
+class AsyncFtxClient:
+    def __init__(self, api: str, secret: str, subaccount: str, url: str = URL, limiter: FairLimiter = None):
+        self.api = api
+        self.secret = secret
+        self.subaccount = urllib.parse.quote(subaccount, safe='')
+        self.url = url
+        self.limiter = limiter
+        self.session = None
+        self.signer = Signer(api, secret, self.subaccount)
+
+    def _session(self) -> aiohttp.ClientSession:
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit=POOL_LIMIT)
+            timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+            self.session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        return self.session
+
+    async def Close(self):
+        if self.session is not None:
+            await self.session.close()
+
+    def sign(self, signaturePayload: str) -> str:
+        return self.signer.Sign(signaturePayload)
+
+    def signHeaders(self, method: str, path: str, body: str) -> dict:
+        return self.signer.Headers(method, path, body)
+
+    async def _request(self, method: str, path: str, body=None, key: str = ""):
+        priority, weight = Request_Class(method, path)
+        data = "" if body is None else json.dumps(body)
+        attempt = 0
+        while attempt <= RATE_LIMIT_RETRIES:
+            if self.limiter is not None:
+                await self.limiter.Acquire(key, weight, priority)
+            headers = self.signHeaders(method, path, data)
+            start = time.perf_counter()
+            try:
+                async with self._session().request(method, self.url + path, headers=headers,
+                                                   data=data if data != "" else None) as resp:
+                    if resp.status == 429:
+                        if self.limiter is not None:
+                            self.limiter.Backoff()
+                        else:
+                            await asyncio.sleep(BACKOFF_SECONDS)
+                        attempt += 1
+                        continue
+                    result = await resp.json(content_type=None)
+                latency.Record(Endpoint(method, path), time.perf_counter() - start)
+                if resp.status != 200 or not isinstance(result, dict) or result.get('success') is not True:
+                    return [None, Request_Error(method, path, resp.status, result)]
+                return [result, None]
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+                print("Error ", method, path, sys.exc_info()[0])
+                return [None, "error"]
+        return [None, "rate limited"]
+
+    async def GetHistoricalPrices(self, market: str, resolution: int, limit: int, startTime: int, endTime: int):
+        return await self._request("GET", "markets/" + market +
+                                   "/candles?resolution=" + str(resolution) +
+                                   "&limit=" + str(limit) +
+                                   "&start_time=" + str(startTime) +
+                                   "&end_time=" + str(endTime), key=market)
+
+    async def GetOrderBook(self, market: str, depth: int):
+        return await self._request("GET", "markets/" + market + "/orderbook?depth=" + str(depth), key=market)
+
+    async def GetPositions(self, showAvgPrice: bool):
+        return await self._request("GET", "positions?showAvgPrice=" + str(showAvgPrice).lower(), key="positions")
+
+    async def PlaceOrder(self, market: str, side: str, price: float, _type: str, size: float, reduceOnly: bool,
+                         ioc: bool, postOnly: bool):
+        return await self._request("POST", "orders", {
+            'market': market,
+            'side': side,
+            'price': price,
+            'type': _type,
+            'size': size,
+            'reduceOnly': reduceOnly,
+            'ioc': ioc,
+            'postOnly': postOnly
+        }, key=market)
+
+    async def GetOpenOrders(self, market: str):
+        return await self._request("GET", "orders?market=" + market, key=market)
+
+    async def CancelOrder(self, orderId: str, market: str = ""):
+        return await self._request("DELETE", "orders/" + str(orderId), key=market)
+
+    async def ModifyOrder(self, orderId: str, market: str, price: float, size: float):
+        return await self._request("POST", "orders/" + str(orderId) + "/modify", {'price': price, 'size': size},
+                                   key=market)
+
+    async def CancelAllOrders(self, market: str):
+        return await self._request("DELETE", "orders", {'market': market}, key=market)
+
+
+class BlockingClient:
+    # FtxClient's blocking interface over an AsyncFtxClient, for OrderManager and CandleCache running on
+    # executor threads: every call is still sent from the client's loop, through its limiter.
+    def __init__(self, client: AsyncFtxClient, loop=None):
+        self.client = client
+        self.loop = loop
+
+    def _call(self, request) -> list:
+        return asyncio.run_coroutine_threadsafe(request, self.loop).result()
+
+    def _result(self, request) -> list:
+        response, err = self._call(request)
+        if err is not None:
+            return [None, err]
+        return [response['result'], None]
+
+    def GetHistoricalPrices(self, market: str, resolution: int, limit: int, startTime: int, endTime: int):
+        return self._call(self.client.GetHistoricalPrices(market, resolution, limit, startTime, endTime))
+
+    def PlaceOrder(self, market: str, side: str, price: float, _type: str, size: float, reduceOnly: bool, ioc: bool,
+                   postOnly: bool):
+        return self._result(self.client.PlaceOrder(market, side, price, _type, size, reduceOnly, ioc, postOnly))
+
+    def GetOpenOrders(self, market: str):
+        return self._result(self.client.GetOpenOrders(market))
+
+    def CancelOrder(self, orderId: str):
+        return self._result(self.client.CancelOrder(orderId))
+
+    def ModifyOrder(self, orderId: str, market: str, side: str, price: float, size: float):
+        return self._result(self.client.ModifyOrder(orderId, market, price, size))
+
+    def CancelAllOrders(self, market: str):
+        return self._result(self.client.CancelAllOrders(market))
@@ -0,0 +1,334 @@
+import sys
+import json
+import time
+import threading
+import urllib
+import hmac
+import hashlib
+import requests
+import ccxt
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from ratelimit import Get_Scheduler, Request_Class, PRIORITY_CANCEL, PRIORITY_ORDER, PRIORITY_DATA
+from orders import ORDER_NOT_FOUND
+
+
+URL = "https://ftx.com/api/"
+POOL_CONNECTIONS = 4
+POOL_MAXSIZE = 16
+RATE_LIMIT_RETRIES = 3
+
+
+class LatencyStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stats = {}
+
+    def Record(self, endpoint: str, seconds: float):
+        with self.lock:
+            stat = self.stats.get(endpoint)
+            if stat is None:
+                stat = [0, 0.0, 0.0, seconds]
+                self.stats[endpoint] = stat
+            stat[0] += 1
+            stat[1] += seconds
+            if seconds > stat[2]:
+                stat[2] = seconds
+            if seconds < stat[3]:
+                stat[3] = seconds
+
+    def Report(self) -> dict:
+        report = {}
+        with self.lock:
+            for endpoint, stat in self.stats.items():
+                report[endpoint] = {
+                    'count': stat[0],
+                    'mean_ms': stat[1] / stat[0] * 1000,
+                    'max_ms': stat[2] * 1000,
+                    'min_ms': stat[3] * 1000
+                }
+        return report
+
+
+latency = LatencyStats()
+_session = None
+_session_lock = threading.Lock()
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def Endpoint(method: str, path: str) -> str:
+    parts = path.split("?")[0].split("/")
+    i = 0
+    while i < len(parts):
+        if parts[i].isdigit():
+            parts[i] = "{id}"
+        i += 1
+    return method + " " + "/".join(parts)
+
+
+def Get_Session() -> requests.Session:
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.session()
+            adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def Get_Client(api: str, secret: str, subaccount: str):
+    key = (api, secret, subaccount)
+    client = _clients.get(key)
+    if client is not None:
+        return client
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = FtxClient(api, secret, subaccount)
+            _clients[key] = client
+        return client
+
+
+def Latency_Report() -> dict:
+    report = latency.Report()
+    report['scheduler'] = Get_Scheduler().Stats()
+    return report
+
+
+class Signer:
+    # The HMAC key schedule is built once; each request copies the keyed state and feeds only the payload.
+    def __init__(self, api: str, secret: str, subaccount: str):
+        self.mac = hmac.new(secret.encode(), digestmod=hashlib.sha256)
+        self.headers = {
+            'Content-Type': 'application/json',
+            'FTX-KEY': api
+        }
+        if subaccount != '':
+            self.headers['FTX-SUBACCOUNT'] = subaccount
+        self.prefixes = {}
+
+    def Sign(self, payload: str) -> str:
+        mac = self.mac.copy()
+        mac.update(payload.encode())
+        return mac.hexdigest()
+
+    def Headers(self, method: str, path: str, body: str) -> dict:
+        prefix = self.prefixes.get(method)
+        if prefix is None:
+            prefix = method + "/api/"
+            self.prefixes[method] = prefix
+        ts = str(int(time.time() * 1000))
+        headers = self.headers.copy()
+        headers['FTX-SIGN'] = self.Sign(ts + prefix + path + body)
+        headers['FTX-TS'] = ts
+        return headers
+
+
+def Public_Get(path: str, key: str = "", timeout: float = None):
+    scheduler = Get_Scheduler()
+    priority, weight = Request_Class("GET", path)
+    attempt = 0
+    while attempt <= RATE_LIMIT_RETRIES:
+        scheduler.Acquire(key, weight, priority)
+        start = time.perf_counter()
+        try:
+            resp = Get_Session().get(URL + path, timeout=timeout)
+        except requests.RequestException:
+            print("Error ", path, sys.exc_info()[0])
+            return [None, "error"]
+        latency.Record(Endpoint("GET", path), time.perf_counter() - start)
+        if resp.status_code >= 500:
+            return [None, "server error " + str(resp.status_code)]
+        if resp.status_code != 429:
+            try:
+                return [resp.json(), None]
+            except ValueError:
+                return [None, "error"]
+        scheduler.Backoff()
+        attempt += 1
+    return [None, "rate limited"]
+
+
+def Parse_Position(arg1: dict, arg2: str) -> list:
+    if arg1 is None or not ('result' in arg1):
+        return [0.0, 0.0, 0.0, 0.0]
+
+    i = 0
+    while i < len(arg1['result']):
+        position = arg1['result'][i]
+        if arg2 == position['future']:
+            return [position.get('realizedPnl', position.get('realizePnl', 0.0)),
+                    position.get('unrealizedPnl', position.get('unrealizePnl', 0.0)),
+                    position['netSize'], position['entryPrice']]
+        i += 1
+    return [0.0, 0.0, 0.0, 0.0]
+
+
+class FtxClient:
+    def __init__(self, api, secret, subaccount):
+        self.api = api
+        self.secret = secret
+        self.subaccount = urllib.parse.quote(subaccount, safe='')
+        self.client = Get_Session()
+        self.scheduler = Get_Scheduler()
+        self.signer = Signer(self.api, self.secret, self.subaccount)
+        self.ftx = ccxt.ftx({
+            'apiKey': self.api,
+            'secret': self.secret,
+            'enableRateLimit': False,
+            'headers': {
+                'FTX-SUBACCOUNT': self.subaccount
+            }
+        })
+
+    def GetHistoricalPrices(self, market: str, resolution: int, limit: int, startTime: int, endTime: int):
+        resp, err = self._get(
+            "markets/" + market +
+                "/candles?resolution=" + str(resolution) +
+                "&limit=" + str(limit) +
+                "&start_time=" + str(startTime) +
+                "&end_time=" + str(endTime), ""
+        )
+        if err != None:
+            print("Error GetHistoricalPrices ", err)
+            return [None, err]
+
+        return [resp, err]
+
+
+    def GetPositions(self, showAvgPrice: bool):
+        resp, err = self._get("positions", "")
+        if err != None:
+            print("Error GetPositions ", err)
+            return [None, err]
+        return [resp, err]
+
+
+    def _ccxt(self, name: str, key: str, priority: int, call):
+        # ccxt's own pacing is off, so a 429 surfaces here as an exception: back the scheduler off and
+        # retry as _send does, and turn every other exchange error into an err instead of raising.
+        attempt = 0
+        while attempt <= RATE_LIMIT_RETRIES:
+            self._throttle(key, priority)
+            start = time.perf_counter()
+            try:
+                result = call()
+            except ccxt.RateLimitExceeded:
+                self.scheduler.Backoff()
+                attempt += 1
+                continue
+            except ccxt.OrderNotFound:
+                return [None, ORDER_NOT_FOUND]
+            except ccxt.BaseError:
+                error = sys.exc_info()[1]
+                if isinstance(error, ccxt.InvalidOrder) and "already closed" in str(error):
+                    return [None, ORDER_NOT_FOUND]
+                print("Error " + name + " ", error)
+                return [None, "error"]
+            latency.Record("ccxt " + name, time.perf_counter() - start)
+            return [result, None]
+        return [None, "rate limited"]
+
+    def PlaceOrder(self, market: str, side: str, price: float, _type: str, size: float, reduceOnly: bool, ioc: bool, postOnly: bool):
+        return self._ccxt("create_order", market, PRIORITY_ORDER,
+                          lambda: self.ftx.create_order(market, _type, side, size, price, {}))
+        # requestBody = {
+        #     'market': market,
+        #     'side': side,
+        #     'price': price,
+        #     'type': _type,
+        #     'size': size,
+        #     'reduceOnly': reduceOnly,
+        #     'ioc': ioc,
+        #     'postOnly': postOnly
+        # }
+        # resp, err = self._post("orders", requestBody)
+        # if err != None:
+        #     print("Error PlaceOrder ", err)
+        #     return [None, err]
+        #
+        # return [resp, err]
+
+    def GetOpenOrders(self, market: str):
+        return self._ccxt("fetch_open_orders", market, PRIORITY_DATA,
+                          lambda: self.ftx.fetch_open_orders(market, None, None, {}))
+        # resp, err = self._get("orders?market=" + market, "")
+        #
+        # if err != None:
+        #     print("Error GetOpenOrders ", err)
+        #     return [None, err]
+        #
+        # return [resp, err]
+
+    def CancelOrder(self, orderId: str):
+        return self._ccxt("cancel_order", "", PRIORITY_CANCEL, lambda: self.ftx.cancel_order(orderId, None, {}))
+        # id = str(orderId)
+        # resp, err = self._delete("orders/" + id, "")
+        #
+        # if err != None:
+        #     print("Error CancelOrder", err)
+        #     return [None, err]
+        #
+        # return [resp.json(), err]
+
+    def ModifyOrder(self, orderId: str, market: str, side: str, price: float, size: float):
+        return self._ccxt("edit_order", market, PRIORITY_ORDER,
+                          lambda: self.ftx.edit_order(orderId, market, "limit", side, size, price, {}))
+
+    def CancelAllOrders(self, market: str):
+        return self._ccxt("cancel_all_orders", market, PRIORITY_CANCEL,
+                          lambda: self.ftx.cancel_all_orders(market, {}))
+
+    def LoadMarkets(self):
+        return self._ccxt("load_markets", "", PRIORITY_DATA, lambda: self.ftx.load_markets())
+
+
+    def sign(self, signaturePayload: str) -> str:
+        return self.signer.Sign(signaturePayload)
+
+    def signRequest(self, method: str, path: str, body):
+        data = "" if body is None or body == "" else json.dumps(body)
+        req = requests.PreparedRequest()
+        req.method = method
+        req.url = URL + path
+        req.headers = CaseInsensitiveDict(self.signer.Headers(method, path, data))
+        if data != "":
+            req.body = data.encode()
+            req.headers['Content-Length'] = str(len(req.body))
+        return req
+
+    def _throttle(self, key: str, priority: int, weight: float = 1):
+        self.scheduler.Acquire(key, weight, priority)
+
+    def _send(self, method: str, path: str, body):
+        priority, weight = Request_Class(method, path)
+        attempt = 0
+        while attempt <= RATE_LIMIT_RETRIES:
+            self._throttle(self.subaccount, priority, weight)
+            req = self.signRequest(method, path, body)
+            start = time.perf_counter()
+            try:
+                resp = self.client.send(req)
+                latency.Record(Endpoint(method, path), time.perf_counter() - start)
+                if resp.status_code == 429:
+                    self.scheduler.Backoff()
+                    attempt += 1
+                    continue
+                return [resp.json(), None]
+            except:
+                print(sys.exc_info()[0])
+                err = "error"
+                return [None, err]
+        return [None, "rate limited"]
+
+    def _post(self, path, body):
+        return self._send("POST", path, body)
+
+    def _get(self, path, body):
+        return self._send("GET", path, body)
+
+    def _delete(self, path: str, body: str):
+        return self._send("DELETE", path, body)
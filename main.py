@@ -1,409 +1,212 @@
-import math
 import sys
+import atexit
 import datetime
-import requests
 import time
-import urllib
-import hmac
-import hashlib
-import ccxt
-
-
-URL = "https://ftx.com/api/"
-
-
-class FtxClient:
-    def __init__(self, api, secret, subaccount):
-        self.api = api
-        self.secret = secret
-        self.subaccount = urllib.parse.quote(subaccount, safe='')
-        self.client = requests.session()
-        self.ftx = ccxt.ftx({
-            'apiKey': self.api,
-            'secret': self.secret,
-            'enableRateLimit': True,
-            'headers': {
-                'FTX-SUBACCOUNT': self.subaccount
-            }
-        })
-
-    def GetHistoricalPrices(self, market: str, resolution: int, limit: int, startTime: int, endTime: int):
-        resp, err = self._get(
-            "markets/" + market +
-                "/candles?resolution=" + str(resolution) +
-                "&limit=" + str(limit) +
-                "&start_time=" + str(startTime) +
-                "&end_time=" + str(endTime), ""
-        )
-        if err != None:
-            print("Error GetHistoricalPrices ", err)
-            return [None, err]
-
-        return [resp, err]
-
-
-    def GetPositions(self, showAvgPrice: bool):
-        resp, err = self._get("positions", "")
-        if err != None:
-            print("Error GetPositions ", err)
-            return [None, err]
-        return [resp, err]
-
-
-    def PlaceOrder(self, market: str, side: str, price: float, _type: str, size: float, reduceOnly: bool, ioc: bool, postOnly: bool):
-        order = self.ftx.create_order(market, _type, side, size, price, {})
-        return [order, None]
-        # requestBody = {
-        #     'market': market,
-        #     'side': side,
-        #     'price': price,
-        #     'type': _type,
-        #     'size': size,
-        #     'reduceOnly': reduceOnly,
-        #     'ioc': ioc,
-        #     'postOnly': postOnly
-        # }
-        # resp, err = self._post("orders", requestBody)
-        # if err != None:
-        #     print("Error PlaceOrder ", err)
-        #     return [None, err]
-        #
-        # return [resp, err]
-
-    def GetOpenOrders(self, market: str):
-        orders = self.ftx.fetch_open_orders(market, None, None, {})
-        return [orders, None]
-        # resp, err = self._get("orders?market=" + market, "")
-        #
-        # if err != None:
-        #     print("Error GetOpenOrders ", err)
-        #     return [None, err]
-        #
-        # return [resp, err]
-
-    def CancelOrder(self, orderId: str):
-        ret = self.ftx.cancel_order(orderId, None, {})
-        return [ret, None]
-        # id = str(orderId)
-        # resp, err = self._delete("orders/" + id, "")
-        #
-        # if err != None:
-        #     print("Error CancelOrder", err)
-        #     return [None, err]
-        #
-        # return [resp.json(), err]
-
-
-    def sign(self, signaturePayload: str) -> str:
-        encoded_secret = self.secret.encode()
-        secret_byte_array = bytearray(encoded_secret)
-        encoded_sgPayload = signaturePayload.encode()
-        sgPayload_byte_array = bytearray(encoded_sgPayload)
-        signature = hmac.new(secret_byte_array, sgPayload_byte_array, hashlib.sha256).hexdigest()
-        return signature
-
-    def signRequest(self, method: str, path: str, body):
-        ts = str(int(datetime.datetime.utcnow().timestamp() * 1000))
-        signaturePayload = ts + method + "/api/" + path + str(body)
-        signature = self.sign(signaturePayload)
-
-        header = {
-            'Content-Type': 'application/json',
-            'FTX-KEY': self.api,
-            'FTX-SIGN': signature,
-            'FTX-TS': ts
-        }
-        if self.subaccount != '':
-            header['FTX-SUBACCOUNT'] = self.subaccount
-        req = requests.Request(method=method, headers=header, url=(URL + path), json=body)
-        prepare = req.prepare()
-        return prepare
-
-    def _post(self, path, body):
-        req = self.signRequest("POST", path, body)
-        try:
-            resp = self.client.send(req)
-            return [resp.json(), None]
-        except:
-            print(sys.exc_info()[0])
-            err = "error"
-            return [None, err]
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from ftx_client import Get_Client, Public_Get, Latency_Report, Parse_Position
+from feed import MarketFeed, PrivateFeed
+from account import AccountState
+from requote import RequoteScheduler
+from tickstore import Recorder
+from candles import Get_Cache
+from timing import timings
+from eventlog import EventLog, CONSOLE_SAMPLE
+from orderbook import OrderBook
+from volatility import RollingVolatility
+from bollinger import BollingerEngine
+from fetch import ResilientFetcher
+from config import Load_Config, ConfigError, ConfigWatcher
+from strategy import StrategyParams, Compute_Quote, Order_Sides
+from orders import Get_Manager
+from engine import Run_Engine
+from snapshot import Snapshot, SnapshotWriter, Snapshot_Path, Load as Load_Snapshot, SNAPSHOT_DIRECTORY
+
+
+VOL_ESTIMATOR = "parkinson"
+VOL_WINDOW = 30
+LATENCY_REPORT_INTERVAL = 100
+TICK_DIRECTORY = "ticks"
+TIMING_FILE = "timings.json"
+TIMING_PORT = 8050
+EVENT_LOG_FILE = "events.jsonl"
+STALE_RETRY = 1.0
+FEED_WAIT = 30
+HEADLESS_FEED_WAIT = 1
+market_feed = None
+private_feed = None
+ticker_symbol = None
+account = AccountState()
+requote = RequoteScheduler()
+recorder = None
+volatility = {}
+bands = {}
+tick_received = 0
+log = None
+echo = True
+
+
+def Book_Stats(response: dict, market: str, depth: int) -> list:
+    result = response.get('result')
+    if not isinstance(result, dict):
+        return None
+    if len(result.get('bids', [])) < depth or len(result.get('asks', [])) < depth:
+        return None
+    book = OrderBook(market, depth)
+    book.Snapshot(result)
+    return book.Stats(depth)
+
+
+def Book_Request(timeout: float, market: str, depth: int):
+    return Public_Get("markets/" + market + "/orderbook?depth=" + str(depth), market, timeout)
+
+
+book_fetcher = ResilientFetcher(Book_Request, Book_Stats)
 
-    def _get(self, path, body):
-        req = self.signRequest("GET", path, body)
-        try:
-            resp = self.client.send(req)
-            return [resp.json(), None]
-        except:
-            print(sys.exc_info()[0])
-            err = "error"
-            return [None, err]
 
-    def _delete(self, path: str, body: str):
-        req = self.signRequest("DELETE", path, body)
-        try:
-            resp = self.client.send(req)
-            return [resp.json(), None]
-        except:
-            print(sys.exc_info()[0])
-            err = "error"
-            return [None, err]
+def Kappa(arg1: int, arg2: str) -> dict:
+    if market_feed is not None:
+        stats = market_feed.Stats(arg2, arg1)
+        if stats is not None:
+            return stats
 
+    return book_fetcher.Fetch(arg2, arg1)
 
-def Kappa(arg1: int, arg2: str) -> dict:
-    depth = str(arg1)
+
+def Seed_Sigma(arg1: str, arg2: str, arg3: str, arg4: str, arg5: str) -> RollingVolatility:
+    client = Get_Client(arg3, arg4, arg5)
     try:
-        r = requests.get("https://ftx.com/api/markets/" + arg2 + "/orderbook?depth=" + depth)
+        interval = int(arg2)
     except:
-        print("Order Book Data Cannot Be Retrived")
-        print("Please Wait Until Order Book Data Can Be Retrived")
-        time.sleep(15)
-
-        Kappa(arg1, arg2)
+        print(sys.exc_info()[0])
 
-    response = r.json()
+    engine = RollingVolatility(interval, VOL_WINDOW)
 
-    if not('result' in response):
-        response['result'] = []
+    t = datetime.datetime.now()
+    past_time = int((t - datetime.timedelta(seconds=interval * VOL_WINDOW)).timestamp())
+    current_time = int(t.timestamp())
 
-    bid_price = []
-    bid_size = []
-    ask_price = []
-    ask_size = []
+    cache = Get_Cache(client)
+    candles = cache.Get(arg1, interval, past_time, current_time)
+    cache.Flush()
 
-    if len(response['result']['bids']) != arg1 or len(response['result']['asks']) != arg1:
-        print("Order Book Data Is Incomplete")
-        print("Please Wait Until Order Book Data Is Full")
-        time.sleep(15)
+    # The still-forming bucket is left to the stream, which would otherwise add it a second time.
+    engine.Seed([candle for candle in candles if candle['time'] + interval * 1000 <= current_time * 1000])
+    if recorder is not None:
+        recorder.RecordCandles(arg1, candles)
+    return engine
 
-        Kappa(arg1, arg2)
 
-    i = 0
-    while i < arg1:
-        bid_price.append(response['result']['bids'][i][0])
-        bid_size.append(response['result']['bids'][i][1])
-        ask_price.append(response['result']['asks'][i][0])
-        ask_size.append(response['result']['asks'][i][1])
-        i += 1
+def Update_Sigma(book: OrderBook):
+    engine = volatility.get(book.market)
+    if engine is None or len(book.bids) == 0 or len(book.asks) == 0:
+        return
+    engine.Update(book.time, (book.bids.Best() + book.asks.Best()) / 2)
 
-    kappa = 0.0
-    total_bid_size = 0.0
-    total_ask_size = 0.0
-    j = 0
-    while j < arg1:
-        kappa = kappa + (bid_price[j] * bid_size[j]) + (ask_price[j] * ask_size[j])
-        total_bid_size = total_bid_size + bid_size[j]
-        total_ask_size = total_ask_size + ask_size[j]
-        j += 1
 
-    midpoint = (bid_price[0] + ask_price[0]) / 2
-    imbalance = total_bid_size / (total_bid_size + total_ask_size)
-    weighted_midpoint = (imbalance * ask_price[0]) + ((1 - imbalance) * bid_price[0])
-    return [midpoint, weighted_midpoint, kappa, bid_price[0], ask_price[0]]
+def Update_Bands(book: OrderBook):
+    if len(book.bids) == 0 or len(book.asks) == 0:
+        return
+    midpoint = (book.bids.Best() + book.asks.Best()) / 2
+    for (market, _), engine in bands.items():
+        if market == book.market:
+            engine.Update(book.time, midpoint)
 
 
-def Sigma(arg1: str, arg2: str, arg3: str, arg4: str, arg5: str, arg6: float) -> float:
-    client = FtxClient(arg3, arg4, arg5)
-    try:
-        interval = int(arg2)
-    except:
-        print(sys.exc_info()[0])
+def On_Book(book: OrderBook):
+    # The sync loop quotes one market; other books must not trigger its requotes.
+    if book.market != ticker_symbol:
+        return
+    Update_Sigma(book)
+    Update_Bands(book)
+    stats = book.Stats(book.depth)
+    if stats is not None:
+        requote.OnPrice(stats[1])
+    engine = volatility.get(book.market)
+    if engine is not None and engine.Ready(VOL_ESTIMATOR):
+        requote.OnSigma(engine.Sigma(VOL_ESTIMATOR))
 
-    t = datetime.datetime.now()
-    past_time = int((t - datetime.timedelta(seconds=interval)).timestamp())
 
-    current_time = int(t.timestamp())
+def On_Fill(fill: dict, position: float):
+    if fill['market'] in volatility:
+        requote.OnInventory(position)
 
-    candles, _ = client.GetHistoricalPrices(arg1, interval, 7, past_time, current_time)
 
-    if not ('result' in candles):
-        candles['result'] = []
-    price_data = []
-    if len(candles['result']) == 0:
-        if arg6 == 0:
+def Sigma(arg1: str, arg2: float) -> float:
+    engine = volatility.get(arg1)
+    if engine is None or not engine.Ready(VOL_ESTIMATOR):
+        if arg2 == 0:
             print("Vol Cannot Be Measured...Shutting Down")
             exit(0)
-        return arg6
+        return arg2
 
-    price_data.append(candles['result'][0]['open'])
-    price_data.append(candles['result'][0]['high'])
-    price_data.append(candles['result'][0]['low'])
-    price_data.append(candles['result'][0]['close'])
-
-    i = 0
-    sum = 0.0
-
-    while i < len(price_data):
-        sum = sum + price_data[i]
-        i += 1
-
-    mean_price = sum / float(len(price_data))
-    average_distance = 0
-
-    j = 0
-    while j < len(price_data):
-        average_distance = average_distance + pow((price_data[j] - mean_price), 2)
-        j += 1
-
-    variance = average_distance / float(len(price_data) - 1)
-    sigma = math.sqrt(variance)
+    sigma = engine.Sigma(VOL_ESTIMATOR)
 
     if sigma == 0:
-        return arg6
+        return arg2
     return sigma
 
 
-def getBollinger(symbol: str, resolution: str, timeperiod: str, nbdevdn:str, nbdevup: str) -> dict:
-    APIKEY = "xxxxx"
-    to_unix_timestamp = str(int(datetime.datetime.now().timestamp()))
-    from_unix_timestamp = str(int(datetime.datetime.now().timestamp() - 10000))
+def Seed_Bands(market: str, resolution: str, configs: list, api: str, secret: str, sub: str) -> BollingerEngine:
+    interval = int(resolution) * 60
+    engine = BollingerEngine(interval)
+    for timeperiod, nbdevup, nbdevdn in configs:
+        engine.Add(timeperiod, nbdevup, nbdevdn)
 
-    generateURL = "https://finnhub.io/api/v1/indicator?symbol=" \
-                    + symbol + "&indicator=BBANDS&resolution=" \
-                    + resolution + "&from=" \
-                    + from_unix_timestamp + "&to=" \
-                    + to_unix_timestamp + "&timeperiod=" \
-                    + timeperiod + "&nbdevup=" \
-                    + nbdevup + "&dbdevdn=" \
-                    + nbdevdn + "&token=" \
-                    + APIKEY
+    longest = max(config[0] for config in configs)
+    now = int(datetime.datetime.now().timestamp())
+    candles = Get_Cache(Get_Client(api, secret, sub)).Get(market, interval, now - interval * (longest + 1), now)
+    engine.Seed(candles)
+    bands[(market, interval)] = engine
+    return engine
 
-    try:
-        r = requests.post(generateURL, headers=None)
-    except:
-        print(sys.exc_info()[0])
 
-    response = r.json()
-    lowerband = response['lowerband'][len(response['lowerband']) - 1]
-    middleband = response['middleband'][len(response['middleband']) - 1]
-    upperband = response['upperband'][len(response['upperband']) - 1 ]
-    return [lowerband, middleband, upperband]
+def getBollinger(symbol: str, resolution: str, timeperiod: str, nbdevdn: str, nbdevup: str) -> list:
+    engine = bands.get((symbol, int(resolution) * 60))
+    if engine is None:
+        return [None, None, None]
+    key = (int(timeperiod), float(nbdevup), float(nbdevdn))
+    if not (key in engine.bands) or not engine.Ready(key):
+        return [None, None, None]
+    return engine.Bands(key)
 
 
 def Get_Positions(arg1: str, arg2: str, arg3: str, arg4: str) -> dict:
-    client = FtxClient(arg1, arg2, arg3)
-    positions, _ = client.GetPositions(True)
-    i = 0
-    if not('result' in positions):
-        positions['result'] = []
-
-    while i < len(positions['result']):
-        if arg4 == positions['result'][i]['future']:
-            return [positions['result'][i]['realizePnl'], positions['result'][i]['unrealizePnl'],
-                    positions['result'][i]['netSize'], positions['result'][i]['entryPrice']]
-        i += 1
-    return [0.0, 0.0, 0.0, 0.0]
-
-
-def Reservation_Price(arg1: float, arg2: float, arg3: float, arg4: float, arg5: float, arg6: float) -> dict:
-    reservation_price = arg1 - (arg2 * arg3 * pow(arg4, 2))
-    aggresive_reservation_price = reservation_price - (arg2 / arg6 * arg5)
-    return [reservation_price, aggresive_reservation_price]
-
+    if account.Live():
+        return account.Details(arg4)
 
-def Optimal_Spread(arg1: float, arg2: float, arg3: float) -> float:
-    optimal_speed = (arg1 * pow(arg2, 2)) + ((2 / arg1) * (math.log(1 + (arg1 / arg3))))
-    return optimal_speed
+    client = Get_Client(arg1, arg2, arg3)
+    positions, _ = client.GetPositions(True)
+    account.Reconcile(positions)
+    return Parse_Position(positions, arg4)
 
 
 def Place_Order(arg1: str, arg2: str, arg3: str, arg4: float, arg5: float, arg6: float,
                 arg7: float, arg8: bool, arg9: str, arg10: float, arg11: float, arg12: float, arg13: float):
-    client = FtxClient(arg1, arg2, arg3)
-    bid_price = arg5 - arg6
-    ask_price = arg5 + arg6
-
-    if arg8 is True:
-        if bid_price > arg10:
-            bid_price = arg10
-        if ask_price < arg11:
-            ask_price = arg11
-
-    if arg13 < -arg12:
-        bid_order, _ = client.PlaceOrder(arg9, "buy", bid_price, "limit", arg4, False, False, arg8)
-        print("Bid Offer: ", bid_order['info']['price'])
-        time.sleep(arg7)
-
-        openOrders, _ = client.GetOpenOrders(arg9)
-
-        if len(openOrders) == 0:
-            print("Bid Order Has Been Filled")
-        elif len(openOrders) > 4:
-            i = 0
-            while i < len(openOrders):
-                cancel, _ = client.CancelOrder(openOrders[i]['id'])
-                print("Order Side Cancelled: ", openOrders[i]['side'])
-                print(cancel)
-                i += 1
-
-            print("Too Many Cancellation Have Failed")
-            exit(0)
-        else:
-            i = 0
-            while i < len(openOrders):
-                cancel, _ = client.CancelOrder(openOrders[i]['id'])
-                print("Order Side Cancelled ", openOrders[i]['side'])
-                print(cancel)
-                i += 1
-    elif arg13 > arg12:
-        ask_order, _ = client.PlaceOrder(arg9, "sell", ask_price, "limit", arg4, False, False, arg8)
-        print("Ask Offer: ", ask_order['info']['price'])
-
-        time.sleep(arg7)
-
-        openOrders, _ = client.GetOpenOrders(arg9)
-
-        if len(openOrders) == 0:
-            print("Ask Order Has Been Filled")
-        elif len(openOrders) > 4:
-            i = 0
-            while i < len(openOrders):
-                cancel, _ = client.CancelOrder(openOrders[i]['id'])
-                print("Order Side Cancelled: ", openOrders[i]['side'])
-                print(cancel)
-                i += 1
-            print("Too Many Cancellations Have Filled")
-            exit(0)
-        else:
-            i = 0
-            while i < len(openOrders):
-                cancel, _ = client.CancelOrder(openOrders[i]['id'])
-                print("Order Side Cancelled: ", openOrders[i]['side'])
-                print(cancel)
-                i += 1
-    else:
-        bid_order = client.PlaceOrder(arg9, "buy", bid_price, "limit", arg4, False, False, arg8)
-
-        print("Ask Offer ", bid_order['info']['price'])
-
-        ask_order, _ = client.PlaceOrder(arg9, "sell", ask_price, "limit", arg4, False, False, arg8)
-        time.sleep(arg7)
-
-        openOrders, _ = client.GetOpenOrders(arg9)
-
-        if len(openOrders) == 0:
-            print("Batch Orders Have Been Filled")
-        elif len(openOrders) > 4:
-            i = 0
-            while i < len(openOrders):
-                cancel, _ = client.CancelOrder(openOrders[i]['id'])
-                print("Order Side Cancelled: ", openOrders[i]['Side'])
-                print(cancel)
-                i += 1
-
-            print("Too Many Cancellations Have Failed")
-            exit(0)
-        else:
-            i = 0
-            while i < len(openOrders):
-                cancel, _ = client.CancelOrder(openOrders[i]['id'])
-                print("Order Side Cancelled: ", openOrders[i]['Side'])
-                print(cancel)
-                i += 1
+    client = Get_Client(arg1, arg2, arg3)
+    manager = Get_Manager(client, arg9, account)
+
+    sides = Order_Sides(arg5, arg6, arg8, arg10, arg11, arg12, arg13)
+    start = time.perf_counter_ns()
+    quotes = manager.Quote(sides, arg4, arg8)
+    timings.Since("submit", start)
+    if tick_received > 0:
+        timings.Record("tick_to_quote", start - tick_received)
+    log.Log("orders", {
+        'bid_offer': quotes['buy']['price'] if 'buy' in quotes else None,
+        'ask_offer': quotes['sell']['price'] if 'sell' in quotes else None
+    }, echo)
+
+    reason = requote.Wait(arg7)
+    log.Log("requote", {'requote_triggered_by': reason}, echo)
+
+    filled = manager.Sync()
+    for side in filled:
+        log.Log("filled", {'market': arg9, 'side': side}, True)
     return ""
 
 
-if __name__ == '__main__':
-    print('Trading Terminal Has Been Started !!')
+def Prompt_Config() -> dict:
     ticker_array = ["ETH-PERP", "BTC-PERP", "UNI-PERP", "LINK-PERP", "MKR-PERP", "DOGE-PERP"]
     print('Please Enter Ticker Symbol')
     print(ticker_array)
@@ -507,83 +310,273 @@ if __name__ == '__main__':
     print("Enter nbdevdn for Lower BBands:")
     nbdevdn = input()
 
-    lowerband, middleband, upperband = getBollinger("BINANCE:ETHUSDT", "1", timeperiod, nbdevdn, nbdevup)
-    print("Lowerband: ", lowerband)
-    print("Middleband: ", middleband)
-    print("Upperband: ", upperband)
-    print("\n")
+    params = StrategyParams(ticker_symbol, stake_price, upper_threshold, lower_threshold, position_size, multiplier,
+                            volatility_interval, order_book_depth, gamma, max_trade_amount, order_time,
+                            minimum_spread, price_aggressor, post_only, inventory_cutoff)
+    return {
+        'api_key': "xxxx",
+        'api_secret': "yyyyy",
+        'subaccount': "zzzz",
+        'markets': [params],
+        'bollinger': [int(timeperiod), float(nbdevup), float(nbdevdn)]
+    }
 
-    api_key = "xxxx"
-    api_secret = "yyyyy"
-    subaccount = "zzzz"
 
-    last_vol = 0.0
-    inventory_target = 0.0
+def Reseed_Sigma(market: str, resolution: str, api: str, secret: str, sub: str):
+    volatility[market] = Seed_Sigma(market, resolution, api, secret, sub)
 
-    i = 0
 
-    while True:
-        sigma = round(Sigma(ticker_symbol, volatility_interval, api_key, api_secret, subaccount, last_vol) * 100) / 100
-        print("Sigma: ", sigma)
+def Restorable_Volatility(snapshot: Snapshot, resolution: str) -> RollingVolatility:
+    # The restored window is only worth quoting on while it still overlaps the live one.
+    engine = snapshot.volatility if snapshot is not None else None
+    if engine is None or engine.interval != int(resolution) or engine.window != VOL_WINDOW:
+        return None
+    if snapshot.Age() >= engine.interval * VOL_WINDOW:
+        return None
+    return engine
 
-        last_vol = sigma
 
-        midpoint, weighted_midpoint, kappa, best_bid, best_ask = Kappa(order_book_depth, ticker_symbol)
-        print("Kappa: ", kappa)
+def Warm_Restart(snapshot: Snapshot, api: str, secret: str, sub: str, market: str) -> dict:
+    client = Get_Client(api, secret, sub)
+    manager = Get_Manager(client, market, account)
 
-        midpoint = round(midpoint * 100) / 100
-        print("Midpoint Price: ", midpoint)
+    # Open orders and positions are fetched together, once, before the first quote.
+    with ThreadPoolExecutor(2) as pool:
+        pending_orders = pool.submit(client.GetOpenOrders, market)
+        pending_positions = pool.submit(client.GetPositions, True)
+        try:
+            openOrders, err = pending_orders.result()
+        except:
+            print("Error Warm Restart Open Orders ", sys.exc_info()[1])
+            openOrders, err = None, "error"
+        try:
+            positions, _ = pending_positions.result()
+        except:
+            print("Error Warm Restart Positions ", sys.exc_info()[1])
+            positions = None
+    account.Reconcile(positions)
+
+    if err is not None or openOrders is None:
+        # What is resting is unknown, so start flat rather than quote on top of it.
+        manager.CancelAll()
+        return {'adopted': [], 'cancelled': 'all'}
+    account.Reconcile_Orders(market, openOrders)
+
+    live = dict((str(order['id']), order) for order in openOrders)
+    adopted = []
+    for side, quote in snapshot.quotes.items():
+        order = live.pop(quote['id'], None)
+        if order is not None:
+            info = order.get('info', order)
+            manager.quotes[side] = {'id': order['id'], 'price': info['price'], 'size': info['size']}
+            adopted.append(side)
+    if len(adopted) == 0:
+        if len(live) > 0:
+            manager.CancelAll()
+    else:
+        # Bulk cancel would take the adopted quotes with it, so only the leftovers go one by one.
+        for order in live.values():
+            client.CancelOrder(order['id'])
+    manager.reconciled = time.monotonic()
+    return {'adopted': adopted, 'cancelled': list(live)}
 
-        weighted_midpoint = round(weighted_midpoint * 100) / 100
-        print("Weighted Midpoint Price: ", weighted_midpoint)
 
-        realized_pnl, unrealized_pnl, current_inventory, entry_price = Get_Positions(api_key, api_secret, subaccount,
-                                                                                     ticker_symbol)
-        print("Current Inventory: ", current_inventory)
-        print("Realized Profit & Loss: ", realized_pnl)
-        print("Unrealized Profit & Loss: ", unrealized_pnl)
-        print("Entry Price: ", entry_price)
+def Warm_Markets(api: str, secret: str, sub: str):
+    # ccxt loads its market list on the first order otherwise, in the middle of the first quote.
+    Get_Client(api, secret, sub).LoadMarkets()
 
-        if weighted_midpoint >= upper_threshold:
-            inventory_target = position_size * multiplier
-        elif weighted_midpoint <= lower_threshold:
-            inventory_target = -(position_size * multiplier)
-        elif weighted_midpoint < stake_price:
-            inventory_target = (((weighted_midpoint - stake_price) / (
-                    stake_price - lower_threshold)) * position_size * multiplier)
-        elif weighted_midpoint == stake_price:
-            inventory_target = 0
-        elif weighted_midpoint > stake_price:
-            inventory_target = (((weighted_midpoint - stake_price) / (
-                    upper_threshold - stake_price)) * position_size * multiplier)
 
-        inventory_target = round(inventory_target * 10000) / 10000
-        print("Inventory Target:", inventory_target)
+def Config_Path(argv: list) -> str:
+    index = argv.index("--config") + 1
+    if index >= len(argv) or argv[index].startswith("--"):
+        raise ConfigError("Missing Config Path After --config")
+    return argv[index]
 
-        target_distance = round((current_inventory - inventory_target) * 10000) / 10000
-        print("Target Distance: ", target_distance)
 
-        order_trade_amount = min(max_trade_amount, abs(target_distance / 5))
-        order_trade_amount = round(order_trade_amount * 10000) / 10000
-        print("Trade Amount: ", order_trade_amount)
+def Warm_Bands(market: str, bollinger: list, api: str, secret: str, sub: str):
+    Seed_Bands(market, "1", [bollinger], api, secret, sub)
+    lowerband, middleband, upperband = getBollinger(market, "1", str(bollinger[0]), str(bollinger[2]),
+                                                    str(bollinger[1]))
+    log.Log("bollinger", {'lowerband': lowerband, 'middleband': middleband, 'upperband': upperband}, True)
 
-        reserve_price, aggressive_reserve_price = Reservation_Price(weighted_midpoint, target_distance, gamma, sigma,
-                                                                    price_aggressor, position_size)
 
-        reserve_price = round(reserve_price * 100) / 100
-        aggressive_reserve_price = round(aggressive_reserve_price * 100) / 100
+if __name__ == '__main__':
+    print('Trading Terminal Has Been Started !!')
+    headless = "--config" in sys.argv
+    if headless:
+        try:
+            config_path = Config_Path(sys.argv)
+            config = Load_Config(config_path)
+        except ConfigError as e:
+            print(e)
+            print("Trading Terminal Has Been Shut Down")
+            exit(1)
+    else:
+        config = Prompt_Config()
+
+    if len(config['markets']) > 1 and not ("--async" in sys.argv):
+        print("Only The Async Engine Quotes More Than One Market, Run With --async Or Configure One Market")
+        print("Trading Terminal Has Been Shut Down")
+        exit(1)
+
+    log = EventLog(EVENT_LOG_FILE, console="--quiet" not in sys.argv)
+    # Drains what is still queued on the way out, Ctrl-C and crashes included.
+    atexit.register(log.Close)
+
+    api_key = config['api_key']
+    api_secret = config['api_secret']
+    subaccount = config['subaccount']
+    params = config['markets'][0]
+    ticker_symbol = params.market
+    volatility_interval = params.volatility_interval
+    order_book_depth = params.order_book_depth
+
+    if not ("--async" in sys.argv):
+        threading.Thread(target=Warm_Markets, args=(api_key, api_secret, subaccount), daemon=True).start()
+
+    if config['bollinger'] is not None:
+        # Nothing gates on the bands yet, so warm them up off the startup path.
+        threading.Thread(target=Warm_Bands, args=(ticker_symbol, config['bollinger'], api_key, api_secret,
+                                                  subaccount), daemon=True).start()
+
+    if headless and not ("--no-reload" in sys.argv):
+        watcher = ConfigWatcher(config_path, config['markets'],
+                                listener=lambda markets: log.Log("config_reload", {'markets': markets}, True))
+        watcher.Start()
+
+    if "--record" in sys.argv:
+        recorder = Recorder(TICK_DIRECTORY)
+        # Ctrl-C and crashes included, so the last partial chunk of every file is kept.
+        atexit.register(recorder.Close)
+
+    snapshot_path = Snapshot_Path(SNAPSHOT_DIRECTORY, subaccount, ticker_symbol)
+    snapshot = None if "--cold" in sys.argv else Load_Snapshot(snapshot_path)
+    if snapshot is not None and (snapshot.market != ticker_symbol or snapshot.subaccount != subaccount):
+        snapshot = None
+
+    restored = Restorable_Volatility(snapshot, volatility_interval)
+    if restored is not None:
+        # Quote on the restored window straight away; the bars missed while down come in with the reseed.
+        volatility[ticker_symbol] = restored
+        threading.Thread(target=Reseed_Sigma, args=(ticker_symbol, volatility_interval, api_key, api_secret,
+                                                    subaccount), daemon=True).start()
+    else:
+        volatility[ticker_symbol] = Seed_Sigma(ticker_symbol, volatility_interval, api_key, api_secret, subaccount)
+
+    market_feed = MarketFeed(trades=recorder is not None)
+    market_feed.AddListener(On_Book)
+    if recorder is not None:
+        market_feed.AddRawListener(recorder.OnMessage)
+    for market_params in config['markets']:
+        market_feed.Subscribe(market_params.market, market_params.order_book_depth)
+    market_feed.Start()
+    # Headless starts quote off REST if the stream is slow; the loop switches to it once it is ready.
+    if not market_feed.WaitReady(ticker_symbol, HEADLESS_FEED_WAIT if headless else FEED_WAIT):
+        print("Order Book Stream Not Ready, Falling Back To REST")
+
+    account.listeners.append(On_Fill)
+    private_feed = PrivateFeed(api_key, api_secret, subaccount, account)
+    private_feed.Start()
+
+    if "--timings" in sys.argv:
+        timings.Serve(TIMING_PORT)
+        timings.Start_Dump(TIMING_FILE)
+
+    if "--async" in sys.argv:
+        Run_Engine(api_key, api_secret, subaccount, config['markets'], market_feed, account=account)
+        exit(0)
 
-        spread = round(Optimal_Spread(gamma, sigma, kappa) * 100) / 100
+    if snapshot is not None:
+        restart = Warm_Restart(snapshot, api_key, api_secret, subaccount, ticker_symbol)
+        restart['age'] = snapshot.Age()
+        restart['volatility_restored'] = restored is not None
+        restart['last_midpoint'] = snapshot.book[0] if snapshot.book is not None else None
+        log.Log("warm_restart", restart, True)
 
-        if spread < minimum_spread:
-            spread = minimum_spread
+    manager = Get_Manager(Get_Client(api_key, api_secret, subaccount), ticker_symbol, account)
+    snapshots = SnapshotWriter(snapshot_path)
 
-        print("Reservation Price: ", reserve_price)
-        print("Aggressive Reservation Price: ", aggressive_reserve_price)
-        print("Optimal Spread: ", spread)
+    last_vol = snapshot.last_vol if snapshot is not None else 0.0
+    inventory_target = snapshot.inventory_target if snapshot is not None else 0.0
+    stale = False
 
+    i = 0
+
+    while True:
+        echo = i % CONSOLE_SAMPLE == 0
+
+        stage = time.perf_counter_ns()
+        sigma = round(Sigma(ticker_symbol, last_vol) * 100) / 100
+        timings.Since("vol", stage)
+
+        last_vol = sigma
+
+        stage = time.perf_counter_ns()
+        stats = Kappa(order_book_depth, ticker_symbol)
+        stage = timings.Since("book", stage)
+        if stats is None:
+            # No fresh book from the stream or REST: pull our quotes rather than leave them on stale prices.
+            if not stale:
+                Get_Manager(Get_Client(api_key, api_secret, subaccount), ticker_symbol, account).CancelAll()
+                stale = True
+            log.Log("stale", {'market': ticker_symbol, 'breaker_open': book_fetcher.breaker.Open(),
+                              'fetch': book_fetcher.stats}, True)
+            time.sleep(STALE_RETRY)
+            continue
+        stale = False
+        midpoint, weighted_midpoint, kappa, best_bid, best_ask = stats
+        tick_received = market_feed.Received(ticker_symbol) or stage
+
+        midpoint = round(midpoint * 100) / 100
+        weighted_midpoint = round(weighted_midpoint * 100) / 100
+
+        stage = time.perf_counter_ns()
+        realized_pnl, unrealized_pnl, current_inventory, entry_price = Get_Positions(api_key, api_secret, subaccount,
+                                                                                     ticker_symbol)
+        timings.Since("positions", stage)
+
+        stage = time.perf_counter_ns()
+        quote = Compute_Quote(params, sigma, weighted_midpoint, kappa, current_inventory, inventory_target)
+        timings.Since("quote", stage)
+
+        inventory_target = quote['inventory_target']
+        target_distance = quote['target_distance']
+        order_trade_amount = quote['order_trade_amount']
+        aggressive_reserve_price = quote['aggressive_reserve_price']
+        spread = quote['spread']
+
+        log.Log("quote", {
+            'market': ticker_symbol,
+            'sigma': sigma,
+            'kappa': kappa,
+            'midpoint_price': midpoint,
+            'weighted_midpoint_price': weighted_midpoint,
+            'current_inventory': current_inventory,
+            'realized_pnl': realized_pnl,
+            'unrealized_pnl': unrealized_pnl,
+            'entry_price': entry_price,
+            'inventory_target': inventory_target,
+            'target_distance': target_distance,
+            'trade_amount': order_trade_amount,
+            'reservation_price': quote['reserve_price'],
+            'aggressive_reservation_price': aggressive_reserve_price,
+            'optimal_spread': spread
+        }, echo)
+
+        requote.Quoted(weighted_midpoint, spread, current_inventory, sigma)
         Place_Order(api_key, api_secret, subaccount, order_trade_amount, aggressive_reserve_price, spread,
-                order_time, post_only, ticker_symbol, best_bid, best_ask, inventory_cutoff, target_distance)
+                params.order_time, params.post_only, ticker_symbol, best_bid, best_ask, params.inventory_cutoff,
+                target_distance)
+
+        if snapshots.Due():
+            stage = time.perf_counter_ns()
+            snapshots.Save(Snapshot(ticker_symbol, subaccount, time.time(), last_vol, inventory_target, stats,
+                                    dict(manager.quotes), volatility.get(ticker_symbol)))
+            timings.Since("snapshot", stage)
+
+        i += 1
+        if i % LATENCY_REPORT_INTERVAL == 0:
+            log.Log("latency", {'request_latency': Latency_Report(), 'stage_timings': timings.Report()}, True)
 
         # if weighted_midpoint >= upper_threshold and current_inventory >= inventory_target:
         #     print("weighted_midpoint >= upper_threshold && current_inventory >= inventory_target, stop placing orders.")
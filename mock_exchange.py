@@ -0,0 +1,187 @@
+import time
+import random
+import asyncio
+from aiohttp import web
+
+
+class MockExchange:
+    def __init__(self, delays: dict = None):
+        self.delays = delays if delays is not None else {}
+        self.books = {}
+        self.candles = {}
+        self.positions = []
+        self.orders = {}
+        self.next_id = 1
+        self.requests = []
+        self.faults = {}
+        self.random = random.Random(0)
+        self.runner = None
+
+    def SetBook(self, market: str, bids: list, asks: list):
+        self.books[market] = {'bids': bids, 'asks': asks}
+
+    def SetFaults(self, route: str, error_rate: float = 0.0, slow_rate: float = 0.0, slow_delay: float = 0.0,
+                  partial_rate: float = 0.0):
+        # Per-route fault injection: 5xx errors, slow responses and (for the order book) truncated levels.
+        self.faults[route] = {'error_rate': error_rate, 'slow_rate': slow_rate, 'slow_delay': slow_delay,
+                              'partial_rate': partial_rate}
+
+    def SetCandles(self, market: str, candles: list):
+        self.candles[market] = candles
+
+    def SetPosition(self, market: str, netSize: float, entryPrice: float, realizedPnl: float = 0.0,
+                    unrealizedPnl: float = 0.0):
+        self.positions = [p for p in self.positions if p['future'] != market]
+        self.positions.append({
+            'future': market,
+            'netSize': netSize,
+            'entryPrice': entryPrice,
+            'realizedPnl': realizedPnl,
+            'unrealizedPnl': unrealizedPnl
+        })
+
+    def Fill(self, orderId: int):
+        order = self.orders.pop(orderId, None)
+        if order is None:
+            return
+        size = order['size'] if order['side'] == 'buy' else -order['size']
+        current = 0.0
+        for p in self.positions:
+            if p['future'] == order['market']:
+                current = p['netSize']
+        self.SetPosition(order['market'], current + size, order['price'])
+
+    async def Start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        app = web.Application()
+        app.router.add_get('/api/markets/{market}/orderbook', self._orderbook)
+        app.router.add_get('/api/markets/{market}/candles', self._candles)
+        app.router.add_get('/api/positions', self._positions)
+        app.router.add_get('/api/orders', self._open_orders)
+        app.router.add_post('/api/orders', self._place_order)
+        app.router.add_delete('/api/orders/{id}', self._cancel_order)
+        app.router.add_delete('/api/orders', self._cancel_all_orders)
+        app.router.add_post('/api/orders/{id}/modify', self._modify_order)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        return "http://" + host + ":" + str(port) + "/api/"
+
+    async def Stop(self):
+        if self.runner is not None:
+            await self.runner.cleanup()
+
+    async def _delay(self, route: str) -> web.Response:
+        self.requests.append([route, time.monotonic()])
+        delay = self.delays.get(route, 0.0)
+        fault = self.faults.get(route)
+        if fault is not None and self.random.random() < fault['slow_rate']:
+            delay = delay + fault['slow_delay']
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if fault is not None and self.random.random() < fault['error_rate']:
+            return self._error("Injected fault", 503)
+        return None
+
+    def _partial(self, route: str) -> bool:
+        fault = self.faults.get(route)
+        return fault is not None and self.random.random() < fault['partial_rate']
+
+    def _ok(self, result) -> web.Response:
+        return web.json_response({'success': True, 'result': result})
+
+    def _error(self, message: str, status: int = 400) -> web.Response:
+        return web.json_response({'success': False, 'error': message}, status=status)
+
+    async def _orderbook(self, request):
+        fault = await self._delay('orderbook')
+        if fault is not None:
+            return fault
+        market = request.match_info['market']
+        depth = int(request.query.get('depth', 20))
+        book = self.books.get(market)
+        if book is None:
+            return self._error("No such market: " + market, 404)
+        if self._partial('orderbook'):
+            depth = depth // 2
+        return self._ok({'bids': book['bids'][:depth], 'asks': book['asks'][:depth]})
+
+    async def _candles(self, request):
+        fault = await self._delay('candles')
+        if fault is not None:
+            return fault
+        market = request.match_info['market']
+        limit = int(request.query.get('limit', 1500))
+        candles = self.candles.get(market, [])
+        return self._ok(candles[-limit:])
+
+    async def _positions(self, request):
+        fault = await self._delay('positions')
+        if fault is not None:
+            return fault
+        return self._ok(self.positions)
+
+    async def _open_orders(self, request):
+        fault = await self._delay('open_orders')
+        if fault is not None:
+            return fault
+        market = request.query.get('market')
+        return self._ok([o for o in self.orders.values() if market is None or o['market'] == market])
+
+    def _create(self, body: dict) -> dict:
+        order = {
+            'id': self.next_id,
+            'market': body['market'],
+            'side': body['side'],
+            'price': body['price'],
+            'type': body['type'],
+            'size': body['size'],
+            'filledSize': 0.0,
+            'remainingSize': body['size'],
+            'status': 'open',
+            'postOnly': body.get('postOnly', False),
+            'reduceOnly': body.get('reduceOnly', False),
+            'ioc': body.get('ioc', False)
+        }
+        self.next_id += 1
+        self.orders[order['id']] = order
+        return order
+
+    async def _place_order(self, request):
+        fault = await self._delay('place_order')
+        if fault is not None:
+            return fault
+        return self._ok(self._create(await request.json()))
+
+    async def _modify_order(self, request):
+        fault = await self._delay('modify_order')
+        if fault is not None:
+            return fault
+        body = await request.json()
+        order = self.orders.pop(int(request.match_info['id']), None)
+        if order is None:
+            return self._error("Order already closed")
+        order = dict(order)
+        order['price'] = body.get('price', order['price'])
+        order['size'] = body.get('size', order['size'])
+        return self._ok(self._create(order))
+
+    async def _cancel_all_orders(self, request):
+        fault = await self._delay('cancel_all_orders')
+        if fault is not None:
+            return fault
+        body = await request.json()
+        market = body.get('market')
+        for order_id in [i for i, o in self.orders.items() if market is None or o['market'] == market]:
+            self.orders.pop(order_id)
+        return self._ok("Orders queued for cancellation")
+
+    async def _cancel_order(self, request):
+        fault = await self._delay('cancel_order')
+        if fault is not None:
+            return fault
+        order_id = int(request.match_info['id'])
+        if self.orders.pop(order_id, None) is None:
+            return self._error("Order already closed")
+        return self._ok("Order queued for cancellation")
@@ -0,0 +1,211 @@
+import zlib
+from array import array
+from bisect import bisect_left
+
+
+CHECKSUM_LEVELS = 100
+RESUM_INTERVAL = 4096
+
+
+class BookSide:
+    def __init__(self, descending: bool, depth: int):
+        self.sign = -1.0 if descending else 1.0
+        self.depth = depth
+        self.keys = array('d')
+        self.sizes = array('d')
+        self.notional = 0.0
+        self.size = 0.0
+        self.updates = 0
+
+    def Clear(self):
+        self.keys = array('d')
+        self.sizes = array('d')
+        self.notional = 0.0
+        self.size = 0.0
+
+    def Load(self, levels: list):
+        self.Clear()
+        for price, size in sorted(levels, key=lambda level: self.sign * float(level[0])):
+            if float(size) != 0:
+                self.keys.append(self.sign * float(price))
+                self.sizes.append(float(size))
+        self.Resum()
+
+    def Resum(self):
+        notional = 0.0
+        size = 0.0
+        i = 0
+        n = min(self.depth, len(self.keys))
+        while i < n:
+            notional = notional + (self.sign * self.keys[i] * self.sizes[i])
+            size = size + self.sizes[i]
+            i += 1
+        self.notional = notional
+        self.size = size
+        self.updates = 0
+
+    def Set(self, price: float, size: float):
+        key = self.sign * price
+        keys = self.keys
+        i = bisect_left(keys, key)
+        found = i < len(keys) and keys[i] == key
+
+        if found:
+            old = self.sizes[i]
+            if size == 0:
+                if i < self.depth:
+                    self.notional = self.notional - price * old
+                    self.size = self.size - old
+                    if len(keys) > self.depth:
+                        entering = self.depth
+                        self.notional = self.notional + self.sign * keys[entering] * self.sizes[entering]
+                        self.size = self.size + self.sizes[entering]
+                del keys[i]
+                del self.sizes[i]
+            else:
+                if i < self.depth:
+                    self.notional = self.notional + price * (size - old)
+                    self.size = self.size + (size - old)
+                self.sizes[i] = size
+        elif size != 0:
+            if i < self.depth:
+                self.notional = self.notional + price * size
+                self.size = self.size + size
+                if len(keys) >= self.depth:
+                    leaving = self.depth - 1
+                    self.notional = self.notional - self.sign * keys[leaving] * self.sizes[leaving]
+                    self.size = self.size - self.sizes[leaving]
+            keys.insert(i, key)
+            self.sizes.insert(i, size)
+        else:
+            return
+
+        self.updates += 1
+        if self.updates >= RESUM_INTERVAL:
+            self.Resum()
+
+    def Best(self) -> float:
+        return self.sign * self.keys[0]
+
+    def Size(self, price: float) -> float:
+        key = self.sign * price
+        i = bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            return self.sizes[i]
+        return 0.0
+
+    def Levels(self, depth: int) -> list:
+        n = min(depth, len(self.keys))
+        return [[self.sign * self.keys[i], self.sizes[i]] for i in range(n)]
+
+    def Sums(self, depth: int) -> list:
+        if depth == self.depth:
+            return [self.notional, self.size]
+        notional = 0.0
+        size = 0.0
+        i = 0
+        while i < depth:
+            notional = notional + (self.sign * self.keys[i] * self.sizes[i])
+            size = size + self.sizes[i]
+            i += 1
+        return [notional, size]
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+
+class OrderBook:
+    def __init__(self, market: str, depth: int = CHECKSUM_LEVELS):
+        self.market = market
+        self.depth = depth
+        self.bids = BookSide(True, depth)
+        self.asks = BookSide(False, depth)
+        self.seq = None
+        self.time = 0.0
+        self.ready = False
+
+    def Snapshot(self, data: dict) -> bool:
+        self.bids.Load(data.get('bids', []))
+        self.asks.Load(data.get('asks', []))
+        self.seq = data.get('seq')
+        self.time = data.get('time', 0.0)
+        self.ready = True
+        return self._verify(data)
+
+    def Update(self, data: dict) -> bool:
+        if not self.ready:
+            return False
+
+        seq = data.get('seq')
+        if seq is not None and self.seq is not None and seq != self.seq + 1:
+            print("Order Book Sequence Gap ", self.market, self.seq, seq)
+            self.ready = False
+            return False
+        if data.get('time', self.time) < self.time:
+            print("Order Book Update Out Of Order ", self.market)
+            self.ready = False
+            return False
+
+        self.Apply(data)
+        return self._verify(data)
+
+    def Apply(self, data: dict):
+        for price, size in data.get('bids', []):
+            self.bids.Set(float(price), float(size))
+        for price, size in data.get('asks', []):
+            self.asks.Set(float(price), float(size))
+        self.seq = data.get('seq')
+        self.time = data.get('time', self.time)
+
+    def _verify(self, data: dict) -> bool:
+        if 'checksum' not in data:
+            return True
+        if self.Checksum() != data['checksum']:
+            print("Order Book Checksum Mismatch ", self.market)
+            self.ready = False
+            return False
+        return True
+
+    def Bids(self, depth: int) -> list:
+        return self.bids.Levels(depth)
+
+    def Asks(self, depth: int) -> list:
+        return self.asks.Levels(depth)
+
+    def Checksum(self) -> int:
+        bids = self.Bids(CHECKSUM_LEVELS)
+        asks = self.Asks(CHECKSUM_LEVELS)
+        parts = []
+        i = 0
+        while i < max(len(bids), len(asks)):
+            if i < len(bids):
+                parts.append(str(bids[i][0]) + ":" + str(bids[i][1]))
+            if i < len(asks):
+                parts.append(str(asks[i][0]) + ":" + str(asks[i][1]))
+            i += 1
+        return zlib.crc32(":".join(parts).encode())
+
+    def Partial(self) -> dict:
+        return {
+            'action': 'partial',
+            'bids': self.Bids(CHECKSUM_LEVELS),
+            'asks': self.Asks(CHECKSUM_LEVELS),
+            'checksum': self.Checksum(),
+            'seq': self.seq,
+            'time': self.time
+        }
+
+    def Stats(self, depth: int) -> list:
+        if len(self.bids) < depth or len(self.asks) < depth:
+            return None
+
+        bid_notional, total_bid_size = self.bids.Sums(depth)
+        ask_notional, total_ask_size = self.asks.Sums(depth)
+        best_bid = self.bids.Best()
+        best_ask = self.asks.Best()
+
+        kappa = bid_notional + ask_notional
+        midpoint = (best_bid + best_ask) / 2
+        imbalance = total_bid_size / (total_bid_size + total_ask_size)
+        weighted_midpoint = (imbalance * best_ask) + ((1 - imbalance) * best_bid)
+        return [midpoint, weighted_midpoint, kappa, best_bid, best_ask]
@@ -0,0 +1,109 @@
+import time
+from account import RECONCILE_INTERVAL
+from timing import timings
+
+
+MAX_OPEN_ORDERS = 4
+# ModifyOrder's error when the order is already gone, the only case where placing afresh is safe.
+ORDER_NOT_FOUND = "not found"
+
+
+class OrderManager:
+    def __init__(self, client, market: str, account=None):
+        self.client = client
+        self.market = market
+        self.account = account
+        self.reconciled = 0.0
+        self.quotes = {}
+
+    def Quote(self, sides: list, size: float, post_only: bool) -> dict:
+        quoted = time.perf_counter_ns()
+        wanted = {}
+        for side, price in sides:
+            wanted[side] = price
+
+        for side in ["buy", "sell"]:
+            live = self.quotes.get(side)
+            if not (side in wanted):
+                if live is not None:
+                    start = time.perf_counter_ns()
+                    self.client.CancelOrder(live['id'])
+                    timings.Since("cancel", start)
+                    self.quotes.pop(side)
+                continue
+
+            price = wanted[side]
+            if live is not None and live['price'] == price and live['size'] == size:
+                continue
+
+            order = None
+            start = time.perf_counter_ns()
+            if live is not None:
+                order, err = self.client.ModifyOrder(live['id'], self.market, side, price, size)
+                if order is None and err != ORDER_NOT_FOUND:
+                    # Rate limited or a transport error: the old order may still be resting, so keep
+                    # tracking it and amend again on the next requote.
+                    continue
+            if order is None:
+                order, err = self.client.PlaceOrder(self.market, side, price, "limit", size, False, False, post_only)
+            if order is None:
+                self.quotes.pop(side, None)
+                continue
+            timings.Since("ack", start)
+            timings.Since("quote_to_ack", quoted)
+            self.quotes[side] = {'id': order['id'], 'price': price, 'size': size}
+        return self.quotes
+
+    def Sync(self) -> list:
+        if self.account is not None and self.account.connected and \
+                time.monotonic() - self.reconciled < RECONCILE_INTERVAL:
+            return self._sync_stream()
+
+        openOrders, err = self.client.GetOpenOrders(self.market)
+        if err is not None or openOrders is None:
+            return []
+        if self.account is not None:
+            self.account.Reconcile_Orders(self.market, openOrders)
+        self.reconciled = time.monotonic()
+
+        live = set(str(order['id']) for order in openOrders)
+        filled = []
+        for side in list(self.quotes):
+            if not (str(self.quotes[side]['id']) in live):
+                filled.append(side)
+                self.quotes.pop(side)
+        self._check_orphans(openOrders, live)
+        return filled
+
+    def _sync_stream(self) -> list:
+        filled = []
+        for side in list(self.quotes):
+            closed = self.account.Closed(self.quotes[side]['id'])
+            if closed is not None:
+                if closed.get('filledSize', 0) > 0:
+                    filled.append(side)
+                self.quotes.pop(side)
+        return filled
+
+    def _check_orphans(self, openOrders: list, live: set):
+        tracked = set(str(quote['id']) for quote in self.quotes.values())
+        if len(openOrders) > MAX_OPEN_ORDERS or len(live - tracked) > 0:
+            self.CancelAll()
+
+    def CancelAll(self):
+        start = time.perf_counter_ns()
+        self.client.CancelAllOrders(self.market)
+        timings.Since("cancel", start)
+        self.quotes = {}
+
+
+_managers = {}
+
+
+def Get_Manager(client, market: str, account=None) -> OrderManager:
+    key = (id(client), market)
+    manager = _managers.get(key)
+    if manager is None:
+        manager = OrderManager(client, market, account)
+        _managers[key] = manager
+    return manager
@@ -0,0 +1,197 @@
+import time
+import asyncio
+import threading
+from collections import OrderedDict, deque
+
+
+PRIORITY_CANCEL = 0
+PRIORITY_ORDER = 1
+PRIORITY_DATA = 2
+PRIORITIES = [PRIORITY_CANCEL, PRIORITY_ORDER, PRIORITY_DATA]
+PRIORITY_NAMES = ["cancel", "order", "data"]
+
+RATE_LIMIT = 30
+RATE_BURST = 30
+BACKOFF_SECONDS = 1.0
+
+# [method, path suffix, weight]; first match wins, anything else costs 1.
+ENDPOINT_WEIGHTS = [
+    ["GET", "/candles", 2],
+    ["GET", "/orderbook", 1],
+    ["DELETE", "orders", 1],
+    ["POST", "/modify", 1],
+]
+
+
+def Request_Class(method: str, path: str) -> list:
+    route = path.split("?")[0]
+    if method == "DELETE":
+        priority = PRIORITY_CANCEL
+    elif method == "POST":
+        priority = PRIORITY_ORDER
+    else:
+        priority = PRIORITY_DATA
+
+    weight = 1
+    for match_method, suffix, match_weight in ENDPOINT_WEIGHTS:
+        if method == match_method and route.endswith(suffix):
+            weight = match_weight
+            break
+    return [priority, weight]
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.queues = [OrderedDict() for _ in PRIORITIES]
+        self.waits = [[0, 0.0, 0.0] for _ in PRIORITIES]
+        self.granted = 0
+        self.backoffs = 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _idle(self) -> bool:
+        for queues in self.queues:
+            if len(queues) > 0:
+                return False
+        return True
+
+    def _enqueue(self, key: str, priority: int, waiter):
+        queue = self.queues[priority].get(key)
+        if queue is None:
+            queue = deque()
+            self.queues[priority][key] = queue
+        queue.append(waiter)
+
+    def _head(self):
+        # Strict priority between classes, round-robin between keys within a class.
+        for queues in self.queues:
+            if len(queues) > 0:
+                key = next(iter(queues))
+                return queues[key][0]
+        return None
+
+    def _pop(self):
+        for queues in self.queues:
+            if len(queues) > 0:
+                key, queue = queues.popitem(last=False)
+                waiter = queue.popleft()
+                if len(queue) > 0:
+                    queues[key] = queue
+                return waiter
+        return None
+
+    def _grant(self, weight: float, priority: int, queued: float):
+        self.tokens -= weight
+        self.granted += 1
+        waited = time.monotonic() - queued
+        stat = self.waits[priority]
+        stat[0] += 1
+        stat[1] += waited
+        if waited > stat[2]:
+            stat[2] = waited
+
+    def Backoff(self, seconds: float = BACKOFF_SECONDS):
+        # Called on a 429: drain the bucket so nothing is sent until it has refilled for `seconds`.
+        self._refill()
+        self.tokens = min(self.tokens, -seconds * self.rate)
+        self.backoffs += 1
+
+    def Stats(self) -> dict:
+        stats = {'granted': self.granted, 'backoffs': self.backoffs, 'tokens': self.tokens}
+        for priority in PRIORITIES:
+            count, total, longest = self.waits[priority]
+            stats[PRIORITY_NAMES[priority]] = {
+                'queued': sum(len(queue) for queue in self.queues[priority].values()),
+                'count': count,
+                'mean_wait_ms': total / count * 1000 if count > 0 else 0.0,
+                'max_wait_ms': longest * 1000
+            }
+        return stats
+
+
+class FairLimiter(TokenBucket):
+    def __init__(self, rate: float, burst: float):
+        TokenBucket.__init__(self, rate, burst)
+        self.dispatcher = None
+
+    async def Acquire(self, key: str, weight: float = 1, priority: int = PRIORITY_DATA):
+        self._refill()
+        if self._idle() and self.tokens >= weight:
+            self._grant(weight, priority, time.monotonic())
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._enqueue(key, priority, [future, weight, priority, time.monotonic()])
+        if self.dispatcher is None or self.dispatcher.done():
+            self.dispatcher = asyncio.ensure_future(self._dispatch())
+        await future
+
+    async def _dispatch(self):
+        while not self._idle():
+            self._refill()
+            future, weight, priority, queued = self._head()
+            if future.cancelled():
+                self._pop()
+                continue
+            if self.tokens < weight:
+                await asyncio.sleep((weight - self.tokens) / self.rate)
+                continue
+
+            self._pop()
+            self._grant(weight, priority, queued)
+            future.set_result(True)
+
+
+class RequestScheduler(TokenBucket):
+    def __init__(self, rate: float, burst: float):
+        TokenBucket.__init__(self, rate, burst)
+        self.cond = threading.Condition()
+
+    def Acquire(self, key: str, weight: float = 1, priority: int = PRIORITY_DATA):
+        with self.cond:
+            self._refill()
+            if self._idle() and self.tokens >= weight:
+                self._grant(weight, priority, time.monotonic())
+                return
+
+            ticket = [None, weight, priority, time.monotonic()]
+            self._enqueue(key, priority, ticket)
+            self.cond.notify_all()
+            while True:
+                self._refill()
+                if self._head() is ticket:
+                    if self.tokens >= weight:
+                        self._pop()
+                        self._grant(weight, priority, ticket[3])
+                        self.cond.notify_all()
+                        return
+                    self.cond.wait((weight - self.tokens) / self.rate)
+                else:
+                    self.cond.wait()
+
+    def Backoff(self, seconds: float = BACKOFF_SECONDS):
+        with self.cond:
+            TokenBucket.Backoff(self, seconds)
+
+    def Stats(self) -> dict:
+        with self.cond:
+            return TokenBucket.Stats(self)
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def Get_Scheduler() -> RequestScheduler:
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = RequestScheduler(RATE_LIMIT, RATE_BURST)
+        return _scheduler
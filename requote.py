@@ -0,0 +1,86 @@
+import time
+import threading
+
+
+SPREAD_FRACTION = 0.25
+SIGMA_CHANGE = 0.2
+DEBOUNCE = 0.25
+
+
+class RequoteScheduler:
+    def __init__(self, spread_fraction: float = SPREAD_FRACTION, sigma_change: float = SIGMA_CHANGE,
+                 debounce: float = DEBOUNCE, clock=time.monotonic):
+        self.spread_fraction = spread_fraction
+        self.sigma_change = sigma_change
+        self.debounce = debounce
+        self.clock = clock
+        self.cond = threading.Condition()
+        self.reason = None
+        self.quoted_at = 0.0
+        self.midpoint = None
+        self.spread = 0.0
+        self.inventory = 0.0
+        self.sigma = 0.0
+        self.counts = {}
+
+    def Quoted(self, weighted_midpoint: float, spread: float, inventory: float, sigma: float):
+        with self.cond:
+            self.midpoint = weighted_midpoint
+            self.spread = spread
+            self.inventory = inventory
+            self.sigma = sigma
+            self.reason = None
+            self.quoted_at = self.clock()
+
+    def OnPrice(self, weighted_midpoint: float):
+        with self.cond:
+            if self.midpoint is None or self.reason is not None:
+                return
+            if abs(weighted_midpoint - self.midpoint) > self.spread_fraction * self.spread:
+                self._trigger("price")
+
+    def OnInventory(self, inventory: float):
+        with self.cond:
+            if self.reason is None and inventory != self.inventory:
+                self._trigger("inventory")
+
+    def OnSigma(self, sigma: float):
+        with self.cond:
+            if self.reason is not None or self.sigma == 0:
+                return
+            if abs(sigma - self.sigma) > self.sigma_change * self.sigma:
+                self._trigger("sigma")
+
+    def _trigger(self, reason: str):
+        self.reason = reason
+        self.counts[reason] = self.counts.get(reason, 0) + 1
+        self.cond.notify_all()
+
+    def Wait(self, max_age: float) -> str:
+        with self.cond:
+            deadline = self.quoted_at + max_age
+            while self.reason is None:
+                remaining = deadline - self.clock()
+                if remaining <= 0:
+                    self.counts["age"] = self.counts.get("age", 0) + 1
+                    return "age"
+                self.cond.wait(remaining)
+
+            hold = self.quoted_at + self.debounce - self.clock()
+            while hold > 0:
+                self.cond.wait(hold)
+                hold = self.quoted_at + self.debounce - self.clock()
+            return self.reason
+
+    def Due(self, max_age: float) -> str:
+        # Wait without blocking, for callers that poll: the backtester on its own clock, and the async engine.
+        with self.cond:
+            now = self.clock()
+            if self.reason is None:
+                if now - self.quoted_at < max_age:
+                    return None
+                self.counts["age"] = self.counts.get("age", 0) + 1
+                return "age"
+            if now - self.quoted_at < self.debounce:
+                return None
+            return self.reason
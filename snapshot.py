@@ -0,0 +1,237 @@
+import os
+import time
+import zlib
+import math
+import struct
+import threading
+from array import array
+from volatility import RollingVolatility
+
+
+SNAPSHOT_DIRECTORY = "snapshots"
+SNAPSHOT_INTERVAL = 5.0
+MAGIC = b"AVSS"
+VERSION = 1
+SIDES = ["buy", "sell"]
+
+# magic, version, crc32 of the payload, payload length
+HEADER = struct.Struct("<4sHIQ")
+# saved_at, last_vol, inventory_target, then the last book stats:
+# midpoint, weighted_midpoint, kappa, best_bid, best_ask
+STATE = struct.Struct("<3d5d")
+QUOTE = struct.Struct("<Bdd")
+# interval, window, head, count, return_count, ewma_lambda, ewma_var, the forming bar and last_close,
+# followed by the three rings. None is stored as NaN.
+VOLATILITY = struct.Struct("<5i8d")
+
+
+class Snapshot:
+    def __init__(self, market: str, subaccount: str, saved_at: float, last_vol: float, inventory_target: float,
+                 book: list, quotes: dict, volatility: RollingVolatility):
+        self.market = market
+        self.subaccount = subaccount
+        self.saved_at = saved_at
+        self.last_vol = last_vol
+        self.inventory_target = inventory_target
+        self.book = book
+        self.quotes = quotes
+        self.volatility = volatility
+
+    def Age(self) -> float:
+        return time.time() - self.saved_at
+
+
+def _nan(value) -> float:
+    return float('nan') if value is None else value
+
+
+def _none(value: float):
+    return None if math.isnan(value) else value
+
+
+def _pack_string(value: str) -> bytes:
+    encoded = value.encode()
+    return struct.pack("<H", len(encoded)) + encoded
+
+
+def _unpack_string(data: bytes, offset: int) -> list:
+    length, = struct.unpack_from("<H", data, offset)
+    offset += 2
+    return [data[offset:offset + length].decode(), offset + length]
+
+
+def _pack_volatility(engine: RollingVolatility) -> bytes:
+    fixed = VOLATILITY.pack(engine.interval, engine.window, engine.head, engine.count, engine.return_count,
+                            engine.ewma_lambda, _nan(engine.ewma_var), _nan(engine.bar_start), engine.open,
+                            engine.high, engine.low, engine.close, _nan(engine.last_close))
+    return fixed + engine.returns.tobytes() + engine.ranges.tobytes() + engine.gk_terms.tobytes()
+
+
+def _unpack_volatility(data: bytes, offset: int) -> list:
+    interval, window, head, count, return_count, ewma_lambda, ewma_var, bar_start, open_price, high, low, close, \
+        last_close = VOLATILITY.unpack_from(data, offset)
+    offset += VOLATILITY.size
+
+    engine = RollingVolatility(interval, window, ewma_lambda)
+    for name in ["returns", "ranges", "gk_terms"]:
+        values = array('d')
+        values.frombytes(data[offset:offset + window * 8])
+        setattr(engine, name, values)
+        offset += window * 8
+
+    engine.head = head
+    engine.count = count
+    engine.return_count = return_count
+    # The loop packs while the feed thread may be adding a bar, so the sums are rebuilt from the rings
+    # rather than stored and possibly a bar apart from them. Unused and first-bar slots hold 0.
+    i = 0
+    while i < count:
+        engine.sum_return = engine.sum_return + engine.returns[i]
+        engine.sum_return_sq = engine.sum_return_sq + engine.returns[i] * engine.returns[i]
+        engine.sum_range = engine.sum_range + engine.ranges[i]
+        engine.sum_gk = engine.sum_gk + engine.gk_terms[i]
+        i += 1
+    engine.ewma_var = _none(ewma_var)
+    bar_start = _none(bar_start)
+    engine.bar_start = None if bar_start is None else int(bar_start)
+    engine.open = open_price
+    engine.high = high
+    engine.low = low
+    engine.close = close
+    engine.last_close = _none(last_close)
+    return [engine, offset]
+
+
+def Pack(snapshot: Snapshot) -> bytes:
+    book = snapshot.book if snapshot.book is not None else [float('nan')] * 5
+    parts = [_pack_string(snapshot.market), _pack_string(snapshot.subaccount),
+             STATE.pack(snapshot.saved_at, snapshot.last_vol, snapshot.inventory_target, *book)]
+
+    quotes = [[side, snapshot.quotes[side]] for side in SIDES if side in snapshot.quotes]
+    parts.append(struct.pack("<B", len(quotes)))
+    for side, quote in quotes:
+        parts.append(QUOTE.pack(SIDES.index(side), quote['price'], quote['size']))
+        parts.append(_pack_string(str(quote['id'])))
+
+    if snapshot.volatility is None:
+        parts.append(struct.pack("<B", 0))
+    else:
+        parts.append(struct.pack("<B", 1))
+        parts.append(_pack_volatility(snapshot.volatility))
+
+    payload = b"".join(parts)
+    return HEADER.pack(MAGIC, VERSION, zlib.crc32(payload), len(payload)) + payload
+
+
+def Unpack(data: bytes) -> Snapshot:
+    if len(data) < HEADER.size:
+        return None
+    magic, version, crc, length = HEADER.unpack_from(data, 0)
+    payload = data[HEADER.size:]
+    if magic != MAGIC or version != VERSION or len(payload) != length or zlib.crc32(payload) != crc:
+        return None
+
+    market, offset = _unpack_string(payload, 0)
+    subaccount, offset = _unpack_string(payload, offset)
+    values = STATE.unpack_from(payload, offset)
+    offset += STATE.size
+    saved_at, last_vol, inventory_target = values[:3]
+    book = list(values[3:]) if not math.isnan(values[3]) else None
+
+    quotes = {}
+    count, = struct.unpack_from("<B", payload, offset)
+    offset += 1
+    while count > 0:
+        side, price, size = QUOTE.unpack_from(payload, offset)
+        order_id, offset = _unpack_string(payload, offset + QUOTE.size)
+        quotes[SIDES[side]] = {'id': order_id, 'price': price, 'size': size}
+        count -= 1
+
+    engine = None
+    has_volatility, = struct.unpack_from("<B", payload, offset)
+    if has_volatility == 1:
+        engine, offset = _unpack_volatility(payload, offset + 1)
+
+    return Snapshot(market, subaccount, saved_at, last_vol, inventory_target, book, quotes, engine)
+
+
+def Snapshot_Path(directory: str, subaccount: str, market: str) -> str:
+    return os.path.join(directory, (subaccount or "main") + "_" + market + ".snap")
+
+
+def Write_Atomic(path: str, data: bytes):
+    # Write beside the target, fsync, then rename over it: a crash leaves either the old snapshot
+    # or the new one, never a torn file.
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    directory = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(directory)
+    finally:
+        os.close(directory)
+
+
+def Load(path: str) -> Snapshot:
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    try:
+        snapshot = Unpack(data)
+    except (struct.error, UnicodeDecodeError, IndexError, ValueError):
+        snapshot = None
+    if snapshot is None:
+        print("Snapshot Corrupt, Ignoring ", path)
+    return snapshot
+
+
+class SnapshotWriter:
+    # The loop packs the state (microseconds) and hands it over; the fsync happens here. Only the
+    # newest pending snapshot is kept, so a slow disk never backs up the loop.
+    def __init__(self, path: str, interval: float = SNAPSHOT_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self.lock = threading.Condition()
+        self.pending = None
+        self.last = 0.0
+        self.written = 0
+        self.running = True
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def Due(self) -> bool:
+        return time.monotonic() - self.last >= self.interval
+
+    def Save(self, snapshot: Snapshot):
+        data = Pack(snapshot)
+        self.last = time.monotonic()
+        with self.lock:
+            self.pending = data
+            self.lock.notify()
+
+    def _run(self):
+        while True:
+            with self.lock:
+                while self.pending is None and self.running:
+                    self.lock.wait()
+                data = self.pending
+                self.pending = None
+                if data is None:
+                    return
+            try:
+                Write_Atomic(self.path, data)
+                self.written += 1
+            except OSError as e:
+                print("Snapshot Write Failed ", e)
+
+    def Close(self):
+        with self.lock:
+            self.running = False
+            self.lock.notify()
+        self.thread.join()
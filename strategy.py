@@ -0,0 +1,161 @@
+import math
+import numpy as np
+
+
+class StrategyParams:
+    def __init__(self, market: str, stake_price: float, upper_threshold: float, lower_threshold: float,
+                 position_size: float, multiplier: float, volatility_interval: str, order_book_depth: int,
+                 gamma: float, max_trade_amount: float, order_time: float, minimum_spread: float,
+                 price_aggressor: float, post_only: bool, inventory_cutoff: float):
+        self.market = market
+        self.stake_price = stake_price
+        self.upper_threshold = upper_threshold
+        self.lower_threshold = lower_threshold
+        self.position_size = position_size
+        self.multiplier = multiplier
+        self.volatility_interval = volatility_interval
+        self.order_book_depth = order_book_depth
+        self.gamma = gamma
+        self.max_trade_amount = max_trade_amount
+        self.order_time = order_time
+        self.minimum_spread = minimum_spread
+        self.price_aggressor = price_aggressor
+        self.post_only = post_only
+        self.inventory_cutoff = inventory_cutoff
+
+
+def Reservation_Price(arg1: float, arg2: float, arg3: float, arg4: float, arg5: float, arg6: float) -> dict:
+    reservation_price = arg1 - (arg2 * arg3 * pow(arg4, 2))
+    aggresive_reservation_price = reservation_price - (arg2 / arg6 * arg5)
+    return [reservation_price, aggresive_reservation_price]
+
+
+def Optimal_Spread(arg1: float, arg2: float, arg3: float) -> float:
+    optimal_speed = (arg1 * pow(arg2, 2)) + ((2 / arg1) * (math.log(1 + (arg1 / arg3))))
+    return optimal_speed
+
+
+def Inventory_Target(arg1: float, arg2: StrategyParams, arg3: float) -> float:
+    weighted_midpoint = arg1
+    params = arg2
+    inventory_target = arg3
+    size = params.position_size * params.multiplier
+
+    if weighted_midpoint >= params.upper_threshold:
+        inventory_target = size
+    elif weighted_midpoint <= params.lower_threshold:
+        inventory_target = -size
+    elif weighted_midpoint < params.stake_price:
+        inventory_target = (((weighted_midpoint - params.stake_price) / (
+                params.stake_price - params.lower_threshold)) * size)
+    elif weighted_midpoint == params.stake_price:
+        inventory_target = 0
+    elif weighted_midpoint > params.stake_price:
+        inventory_target = (((weighted_midpoint - params.stake_price) / (
+                params.upper_threshold - params.stake_price)) * size)
+
+    return round(inventory_target * 10000) / 10000
+
+
+def Compute_Quote(arg1: StrategyParams, arg2: float, arg3: float, arg4: float, arg5: float, arg6: float) -> dict:
+    params = arg1
+    sigma = arg2
+    weighted_midpoint = arg3
+    kappa = arg4
+    current_inventory = arg5
+
+    inventory_target = Inventory_Target(weighted_midpoint, params, arg6)
+    target_distance = round((current_inventory - inventory_target) * 10000) / 10000
+
+    order_trade_amount = min(params.max_trade_amount, abs(target_distance / 5))
+    order_trade_amount = round(order_trade_amount * 10000) / 10000
+
+    reserve_price, aggressive_reserve_price = Reservation_Price(weighted_midpoint, target_distance, params.gamma,
+                                                                sigma, params.price_aggressor, params.position_size)
+    reserve_price = round(reserve_price * 100) / 100
+    aggressive_reserve_price = round(aggressive_reserve_price * 100) / 100
+
+    spread = round(Optimal_Spread(params.gamma, sigma, kappa) * 100) / 100
+    if spread < params.minimum_spread:
+        spread = params.minimum_spread
+
+    return {
+        'inventory_target': inventory_target,
+        'target_distance': target_distance,
+        'order_trade_amount': order_trade_amount,
+        'reserve_price': reserve_price,
+        'aggressive_reserve_price': aggressive_reserve_price,
+        'spread': spread
+    }
+
+
+def Reservation_Prices(midpoints, target_distances, gammas, sigmas, price_aggressors, position_sizes) -> list:
+    midpoints = np.asarray(midpoints, dtype=np.float64)
+    target_distances = np.asarray(target_distances, dtype=np.float64)
+    reservation_prices = midpoints - (target_distances * gammas * np.square(sigmas))
+    aggressive_reservation_prices = reservation_prices - (target_distances / position_sizes * price_aggressors)
+    return [reservation_prices, aggressive_reservation_prices]
+
+
+def Optimal_Spreads(gammas, sigmas, kappas):
+    gammas = np.asarray(gammas, dtype=np.float64)
+    return (gammas * np.square(sigmas)) + ((2 / gammas) * np.log(1 + (gammas / kappas)))
+
+
+def Inventory_Targets(midpoints, params: StrategyParams, last_targets=0.0):
+    midpoints = np.asarray(midpoints, dtype=np.float64)
+    size = params.position_size * params.multiplier
+    below = ((midpoints - params.stake_price) / (params.stake_price - params.lower_threshold)) * size
+    above = ((midpoints - params.stake_price) / (params.upper_threshold - params.stake_price)) * size
+    targets = np.select(
+        [midpoints >= params.upper_threshold, midpoints <= params.lower_threshold, midpoints < params.stake_price,
+         midpoints == params.stake_price, midpoints > params.stake_price],
+        [size, -size, below, 0.0, above],
+        np.broadcast_to(np.asarray(last_targets, dtype=np.float64), midpoints.shape))
+    return np.round(targets * 10000) / 10000
+
+
+def Compute_Quotes(params: StrategyParams, sigmas, midpoints, kappas, inventories, last_targets=0.0,
+                   gammas=None) -> dict:
+    # Row-for-row identical to Compute_Quote; gammas overrides params.gamma per row for sweeps.
+    if gammas is None:
+        gammas = params.gamma
+    inventory_targets = Inventory_Targets(midpoints, params, last_targets)
+    target_distances = np.round((np.asarray(inventories, dtype=np.float64) - inventory_targets) * 10000) / 10000
+
+    order_trade_amounts = np.minimum(params.max_trade_amount, np.abs(target_distances / 5))
+    order_trade_amounts = np.round(order_trade_amounts * 10000) / 10000
+
+    reserve_prices, aggressive_reserve_prices = Reservation_Prices(midpoints, target_distances, gammas, sigmas,
+                                                                   params.price_aggressor, params.position_size)
+    reserve_prices = np.round(reserve_prices * 100) / 100
+    aggressive_reserve_prices = np.round(aggressive_reserve_prices * 100) / 100
+
+    spreads = np.round(Optimal_Spreads(gammas, sigmas, kappas) * 100) / 100
+    spreads = np.maximum(spreads, params.minimum_spread)
+
+    return {
+        'inventory_target': inventory_targets,
+        'target_distance': target_distances,
+        'order_trade_amount': order_trade_amounts,
+        'reserve_price': reserve_prices,
+        'aggressive_reserve_price': aggressive_reserve_prices,
+        'spread': spreads
+    }
+
+
+def Order_Sides(arg1: float, arg2: float, arg3: bool, arg4: float, arg5: float, arg6: float, arg7: float) -> list:
+    bid_price = arg1 - arg2
+    ask_price = arg1 + arg2
+
+    if arg3 is True:
+        if bid_price > arg4:
+            bid_price = arg4
+        if ask_price < arg5:
+            ask_price = arg5
+
+    if arg7 < -arg6:
+        return [["buy", bid_price]]
+    elif arg7 > arg6:
+        return [["sell", ask_price]]
+    return [["buy", bid_price], ["sell", ask_price]]
@@ -0,0 +1,307 @@
+import sys
+import json
+import time
+import queue
+import threading
+import multiprocessing
+from multiprocessing import shared_memory
+import numpy as np
+from orderbook import OrderBook
+from config import Parse_Account
+from ftx_client import URL
+
+
+SHARED_DEPTH = 100
+HEADER = 4
+RESTART_DELAY = 1.0
+RESTART_MAX = 60.0
+MONITOR_INTERVAL = 0.5
+READ_RETRIES = 100
+# Workers quote off REST rather than a block the feed hasn't refreshed in this long.
+MAX_BOOK_AGE = 5.0
+
+
+class SharedBook:
+    # One shared-memory block per market: [seq, time, bid levels, ask levels] then bid and ask
+    # (price, size) pairs. seq is a seqlock: odd while the writer is mid-update, so readers retry.
+    def __init__(self, market: str, depth: int = SHARED_DEPTH, name: str = None):
+        self.market = market
+        self.depth = depth
+        size = (HEADER + depth * 4) * 8
+        if name is None:
+            self.memory = shared_memory.SharedMemory(create=True, size=size)
+            self.owner = True
+        else:
+            self.memory = shared_memory.SharedMemory(name=name)
+            self.owner = False
+        self.values = np.ndarray(HEADER + depth * 4, dtype=np.float64, buffer=self.memory.buf)
+        if self.owner:
+            self.values[:] = 0.0
+
+    def Name(self) -> str:
+        return self.memory.name
+
+    def Write(self, book: OrderBook):
+        values = self.values
+        bids = book.Bids(self.depth)
+        asks = book.Asks(self.depth)
+        values[0] += 1
+        values[1] = book.time
+        values[2] = len(bids)
+        values[3] = len(asks)
+        if len(bids) > 0:
+            values[HEADER:HEADER + len(bids) * 2] = np.asarray(bids, dtype=np.float64).ravel()
+        if len(asks) > 0:
+            start = HEADER + self.depth * 2
+            values[start:start + len(asks) * 2] = np.asarray(asks, dtype=np.float64).ravel()
+        values[0] += 1
+
+    def Invalidate(self):
+        # Zero level counts fail every depth check, so readers stop quoting on the last book.
+        values = self.values
+        values[0] += 1
+        values[2] = 0
+        values[3] = 0
+        values[0] += 1
+
+    def Read(self) -> list:
+        values = self.values
+        attempt = 0
+        while attempt < READ_RETRIES:
+            seq = values[0]
+            if seq % 2 == 0:
+                copy = values.copy()
+                if values[0] == seq:
+                    return copy
+            attempt += 1
+        return None
+
+    def Stats(self, depth: int, max_age: float = MAX_BOOK_AGE) -> list:
+        values = self.Read()
+        if values is None or values[0] == 0 or values[2] < depth or values[3] < depth:
+            return None
+        if time.time() - values[1] > max_age:
+            return None
+        bids = values[HEADER:HEADER + depth * 2].reshape(depth, 2)
+        start = HEADER + self.depth * 2
+        asks = values[start:start + depth * 2].reshape(depth, 2)
+
+        kappa = float(np.dot(bids[:, 0], bids[:, 1]) + np.dot(asks[:, 0], asks[:, 1]))
+        total_bid_size = float(bids[:, 1].sum())
+        total_ask_size = float(asks[:, 1].sum())
+        best_bid = float(bids[0, 0])
+        best_ask = float(asks[0, 0])
+        midpoint = (best_bid + best_ask) / 2
+        imbalance = total_bid_size / (total_bid_size + total_ask_size)
+        weighted_midpoint = (imbalance * best_ask) + ((1 - imbalance) * best_bid)
+        return [midpoint, weighted_midpoint, kappa, best_bid, best_ask]
+
+    def Close(self):
+        self.values = None
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+
+class SharedFeed:
+    # Worker-side view of the supervisor's books, with the Stats/Received interface of MarketFeed.
+    def __init__(self, names: dict, depth: int = SHARED_DEPTH, max_age: float = MAX_BOOK_AGE):
+        self.books = dict((market, SharedBook(market, depth, name)) for market, name in names.items())
+        self.max_age = max_age
+
+    def Stats(self, market: str, depth: int) -> list:
+        book = self.books.get(market)
+        if book is None:
+            return None
+        return book.Stats(depth, self.max_age)
+
+    def Received(self, market: str) -> int:
+        return 0
+
+    def Close(self):
+        for book in self.books.values():
+            book.Close()
+
+
+def _run_shard(api: str, secret: str, subaccount: str, markets: list, names: dict, results, url: str):
+    from engine import Run_Engine
+
+    feed = SharedFeed(names)
+
+    def report(market: str, details: list):
+        realized_pnl, unrealized_pnl, inventory, entry_price = details
+        results.put([subaccount, market, realized_pnl, unrealized_pnl, inventory, entry_price, time.time()])
+
+    try:
+        Run_Engine(api, secret, subaccount, markets, feed, [report], url)
+    finally:
+        feed.Close()
+
+
+class Shard:
+    def __init__(self, api: str, secret: str, subaccount: str, markets: list):
+        self.api = api
+        self.secret = secret
+        self.subaccount = subaccount
+        self.markets = markets
+        self.process = None
+        self.restarts = 0
+        self.restart_at = 0.0
+        self.exitcode = None
+
+
+class Supervisor:
+    # Shards are grouped by subaccount: each runs in its own process with its own AsyncFtxClient and
+    # limiter, so one subaccount's rate budget, or crash, never touches another's.
+    def __init__(self, shards: list, feed=None, url: str = URL):
+        self.context = multiprocessing.get_context("spawn")
+        self.results = self.context.Queue()
+        self.shards = [Shard(api, secret, subaccount, markets) for api, secret, subaccount, markets in shards]
+        self.feed = feed
+        self.url = url
+        self.books = {}
+        self.positions = {}
+        self.lock = threading.Lock()
+        self.running = False
+        self.threads = []
+
+    def _on_book(self, book: OrderBook):
+        shared = self.books.get(book.market)
+        if shared is not None:
+            shared.Write(book)
+
+    def _on_stale(self, market: str):
+        shared = self.books.get(market)
+        if shared is not None:
+            shared.Invalidate()
+
+    def _start_shard(self, shard: Shard):
+        names = dict((params.market, self.books[params.market].Name()) for params in shard.markets)
+        args = (shard.api, shard.secret, shard.subaccount, shard.markets, names, self.results, self.url)
+        shard.process = self.context.Process(target=_run_shard, args=args, daemon=True)
+        shard.process.start()
+
+    def Start(self):
+        from feed import MarketFeed
+
+        markets = {}
+        for shard in self.shards:
+            for params in shard.markets:
+                markets[params.market] = max(markets.get(params.market, 0), params.order_book_depth)
+        for market in markets:
+            self.books[market] = SharedBook(market)
+
+        if self.feed is None:
+            self.feed = MarketFeed()
+        self.feed.AddListener(self._on_book)
+        self.feed.AddStaleListener(self._on_stale)
+        for market, depth in markets.items():
+            self.feed.Subscribe(market, max(depth, SHARED_DEPTH))
+        self.feed.Start()
+
+        self.running = True
+        for shard in self.shards:
+            self._start_shard(shard)
+        self.threads = [threading.Thread(target=self._collect, daemon=True),
+                        threading.Thread(target=self._monitor, daemon=True)]
+        for thread in self.threads:
+            thread.start()
+
+    def _collect(self):
+        while self.running:
+            try:
+                subaccount, market, realized_pnl, unrealized_pnl, inventory, entry_price, updated = \
+                    self.results.get(timeout=MONITOR_INTERVAL)
+            except queue.Empty:
+                continue
+            with self.lock:
+                self.positions[(subaccount, market)] = {
+                    'realized_pnl': realized_pnl,
+                    'unrealized_pnl': unrealized_pnl,
+                    'inventory': inventory,
+                    'entry_price': entry_price,
+                    'updated': updated
+                }
+
+    def _monitor(self):
+        while self.running:
+            now = time.monotonic()
+            for shard in self.shards:
+                if shard.process is None or shard.process.is_alive():
+                    continue
+                if shard.restart_at == 0.0:
+                    shard.exitcode = shard.process.exitcode
+                    delay = min(RESTART_MAX, RESTART_DELAY * (2 ** shard.restarts))
+                    shard.restart_at = now + delay
+                    print("Shard Exited ", shard.subaccount, shard.exitcode, ", Restarting In ", delay)
+                elif now >= shard.restart_at and self.running:
+                    shard.restarts += 1
+                    shard.restart_at = 0.0
+                    self._start_shard(shard)
+            time.sleep(MONITOR_INTERVAL)
+
+    def Positions(self) -> dict:
+        with self.lock:
+            return dict(self.positions)
+
+    def Totals(self) -> dict:
+        totals = {}
+        with self.lock:
+            for (subaccount, market), position in self.positions.items():
+                total = totals.get(market)
+                if total is None:
+                    total = {'realized_pnl': 0.0, 'unrealized_pnl': 0.0, 'inventory': 0.0, 'subaccounts': 0}
+                    totals[market] = total
+                total['realized_pnl'] += position['realized_pnl']
+                total['unrealized_pnl'] += position['unrealized_pnl']
+                total['inventory'] += position['inventory']
+                total['subaccounts'] += 1
+        return totals
+
+    def Status(self) -> list:
+        return [{'subaccount': shard.subaccount, 'markets': [params.market for params in shard.markets],
+                 'alive': shard.process is not None and shard.process.is_alive(), 'restarts': shard.restarts,
+                 'exitcode': shard.exitcode} for shard in self.shards]
+
+    def Stop(self):
+        self.running = False
+        for shard in self.shards:
+            if shard.process is not None and shard.process.is_alive():
+                shard.process.terminate()
+        for shard in self.shards:
+            if shard.process is not None:
+                shard.process.join()
+        for thread in self.threads:
+            thread.join()
+        self.feed.Stop()
+        # Detached first, so a late stale callback from the feed thread finds nothing to invalidate.
+        books = self.books
+        self.books = {}
+        for book in books.values():
+            book.Close()
+
+
+def Load_Shards(path: str) -> list:
+    with open(path) as f:
+        config = json.load(f)
+    shards = []
+    for values in config['accounts']:
+        account = Parse_Account(values)
+        shards.append([account['api_key'], account['api_secret'], account['subaccount'], account['markets']])
+    return shards
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print("Usage: python supervisor.py <shards.json>")
+        exit(0)
+
+    supervisor = Supervisor(Load_Shards(sys.argv[1]))
+    supervisor.Start()
+    try:
+        while True:
+            time.sleep(10)
+            print("Shards: ", supervisor.Status())
+            print("Totals: ", supervisor.Totals())
+    except KeyboardInterrupt:
+        supervisor.Stop()
@@ -0,0 +1,245 @@
+import os
+import mmap
+import zlib
+import datetime
+import threading
+from array import array
+import numpy as np
+
+
+CHUNK_SIZE = 4096
+COMPRESS_LEVEL = 1
+# Upper bound on how much of a quiet or crashed session's tail is lost.
+FLUSH_INTERVAL = 5.0
+
+SCHEMAS = {
+    'book': [['time', 'd'], ['side', 'b'], ['price', 'd'], ['size', 'd'], ['partial', 'b']],
+    'trades': [['time', 'd'], ['side', 'b'], ['price', 'd'], ['size', 'd']],
+    'candles': [['time', 'd'], ['open', 'd'], ['high', 'd'], ['low', 'd'], ['close', 'd'], ['volume', 'd']]
+}
+
+DTYPES = {'d': np.float64, 'b': np.int8, 'q': np.int64}
+
+INDEX_DTYPE = np.dtype([
+    ('first', '<f8'),
+    ('last', '<f8'),
+    ('offset', '<u8'),
+    ('nbytes', '<u8'),
+    ('count', '<u4'),
+    ('compressed', '<u1')
+])
+
+
+class TickWriter:
+    def __init__(self, path: str, schema: str, chunk_size: int = CHUNK_SIZE, compress: bool = True):
+        self.path = path
+        self.columns = SCHEMAS[schema]
+        self.chunk_size = chunk_size
+        self.compress = compress
+        self.data = open(path + ".dat", "ab")
+        self.index = open(path + ".idx", "ab")
+        self.buffers = [array(typecode) for _, typecode in self.columns]
+        self.count = 0
+
+    def Append(self, *values):
+        buffers = self.buffers
+        i = 0
+        while i < len(values):
+            buffers[i].append(values[i])
+            i += 1
+        self.count += 1
+        if self.count >= self.chunk_size:
+            self.Flush()
+
+    def Flush(self):
+        if self.count == 0:
+            return
+        payload = b"".join(buffer.tobytes() for buffer in self.buffers)
+        if self.compress:
+            payload = zlib.compress(payload, COMPRESS_LEVEL)
+
+        offset = self.data.seek(0, os.SEEK_END)
+        self.data.write(payload)
+        self.data.flush()
+
+        entry = np.zeros(1, dtype=INDEX_DTYPE)
+        entry['first'] = self.buffers[0][0]
+        entry['last'] = self.buffers[0][-1]
+        entry['offset'] = offset
+        entry['nbytes'] = len(payload)
+        entry['count'] = self.count
+        entry['compressed'] = 1 if self.compress else 0
+        self.index.write(entry.tobytes())
+        self.index.flush()
+
+        self.buffers = [array(typecode) for _, typecode in self.columns]
+        self.count = 0
+
+    def Close(self):
+        self.Flush()
+        self.data.close()
+        self.index.close()
+
+
+class TickReader:
+    def __init__(self, path: str, schema: str):
+        self.columns = SCHEMAS[schema]
+        self.index = np.fromfile(path + ".idx", dtype=INDEX_DTYPE)
+        self.file = open(path + ".dat", "rb")
+        self.map = None
+        if os.path.getsize(path + ".dat") > 0:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def Close(self):
+        if self.map is not None:
+            try:
+                self.map.close()
+            except BufferError:
+                # Arrays returned from uncompressed chunks still view the map; it is released with them.
+                pass
+        self.file.close()
+
+    def Count(self) -> int:
+        return int(self.index['count'].sum())
+
+    def _decode(self, entry) -> dict:
+        start = int(entry['offset'])
+        end = start + int(entry['nbytes'])
+        count = int(entry['count'])
+        if entry['compressed']:
+            buffer = zlib.decompress(self.map[start:end])
+            base = 0
+        else:
+            buffer = self.map
+            base = start
+
+        columns = {}
+        for name, typecode in self.columns:
+            dtype = DTYPES[typecode]
+            columns[name] = np.frombuffer(buffer, dtype=dtype, count=count, offset=base)
+            base += count * np.dtype(dtype).itemsize
+        return columns
+
+    def Chunks(self, start: float = None, end: float = None):
+        if len(self.index) == 0:
+            return
+        first = 0
+        last = len(self.index)
+        if start is not None:
+            first = int(np.searchsorted(self.index['last'], start, side='left'))
+        if end is not None:
+            last = int(np.searchsorted(self.index['first'], end, side='right'))
+
+        i = first
+        while i < last:
+            columns = self._decode(self.index[i])
+            times = columns['time']
+            lo = 0
+            hi = len(times)
+            if start is not None and times[0] < start:
+                lo = int(np.searchsorted(times, start, side='left'))
+            if end is not None and times[-1] > end:
+                hi = int(np.searchsorted(times, end, side='right'))
+            if lo < hi:
+                if lo > 0 or hi < len(times):
+                    columns = dict((name, values[lo:hi]) for name, values in columns.items())
+                yield columns
+            i += 1
+
+    def Range(self, start: float = None, end: float = None) -> dict:
+        chunks = list(self.Chunks(start, end))
+        if len(chunks) == 1:
+            return chunks[0]
+        result = {}
+        for name, typecode in self.columns:
+            if len(chunks) == 0:
+                result[name] = np.empty(0, dtype=DTYPES[typecode])
+            else:
+                result[name] = np.concatenate([chunk[name] for chunk in chunks])
+        return result
+
+
+def Candle_Time(candle: dict) -> float:
+    if 'time' in candle:
+        return candle['time'] / 1000.0
+    return datetime.datetime.fromisoformat(candle['startTime']).timestamp()
+
+
+class Recorder:
+    # Book and trade messages arrive on the feed thread and candles on the main one, so every entry
+    # point holds the lock; a background thread flushes partial chunks every flush_interval.
+    def __init__(self, directory: str, compress: bool = True, chunk_size: int = CHUNK_SIZE,
+                 flush_interval: float = FLUSH_INTERVAL):
+        self.directory = directory
+        self.compress = compress
+        self.chunk_size = chunk_size
+        self.writers = {}
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        os.makedirs(directory, exist_ok=True)
+        self.thread = threading.Thread(target=self._run, args=(flush_interval,), daemon=True)
+        self.thread.start()
+
+    def _run(self, interval: float):
+        while not self.stopped.wait(interval):
+            self.Flush()
+
+    def Writer(self, market: str, schema: str) -> TickWriter:
+        key = (market, schema)
+        writer = self.writers.get(key)
+        if writer is None:
+            path = os.path.join(self.directory, market + "." + schema)
+            writer = TickWriter(path, schema, self.chunk_size, self.compress)
+            self.writers[key] = writer
+        return writer
+
+    def RecordBook(self, market: str, data: dict, partial: bool):
+        timestamp = data.get('time', 0.0)
+        flag = 1 if partial else 0
+        with self.lock:
+            if self.stopped.is_set():
+                return
+            writer = self.Writer(market, 'book')
+            for price, size in data.get('bids', []):
+                writer.Append(timestamp, 0, price, size, flag)
+            for price, size in data.get('asks', []):
+                writer.Append(timestamp, 1, price, size, flag)
+
+    def RecordTrade(self, market: str, trade: dict):
+        timestamp = trade['time']
+        if isinstance(timestamp, str):
+            timestamp = datetime.datetime.fromisoformat(timestamp).timestamp()
+        with self.lock:
+            if self.stopped.is_set():
+                return
+            self.Writer(market, 'trades').Append(timestamp, 0 if trade['side'] == 'buy' else 1, trade['price'],
+                                                 trade['size'])
+
+    def RecordCandles(self, market: str, candles: list):
+        with self.lock:
+            if self.stopped.is_set():
+                return
+            writer = self.Writer(market, 'candles')
+            for candle in candles:
+                writer.Append(Candle_Time(candle), candle['open'], candle['high'], candle['low'], candle['close'],
+                              candle.get('volume', 0.0))
+
+    def OnMessage(self, msg: dict):
+        channel = msg.get('channel')
+        if channel == 'orderbook' and msg.get('type') in ['partial', 'update']:
+            self.RecordBook(msg['market'], msg['data'], msg['type'] == 'partial')
+        elif channel == 'trades' and msg.get('type') == 'update':
+            for trade in msg['data']:
+                self.RecordTrade(msg['market'], trade)
+
+    def Flush(self):
+        with self.lock:
+            for writer in self.writers.values():
+                writer.Flush()
+
+    def Close(self):
+        self.stopped.set()
+        with self.lock:
+            for writer in self.writers.values():
+                writer.Close()
+            self.writers = {}
@@ -0,0 +1,127 @@
+import os
+import json
+import time
+import threading
+
+
+SUB_BITS = 4
+SUB_BUCKETS = 1 << SUB_BITS
+MAX_BITS = 64
+DUMP_INTERVAL = 60
+PERCENTILES = [50, 90, 99, 99.9]
+
+
+class Histogram:
+    # Log-linear buckets over nanoseconds: 16 linear sub-buckets per power of two (~6% resolution).
+    # Record() is lock-free; a lost increment under a thread switch only skews a count by one.
+    def __init__(self):
+        self.counts = [0] * (MAX_BITS * SUB_BUCKETS)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def Record(self, ns: int):
+        bits = ns.bit_length()
+        shift = bits - SUB_BITS - 1
+        if shift > 0:
+            self.counts[(bits << SUB_BITS) + ((ns >> shift) & (SUB_BUCKETS - 1))] += 1
+        else:
+            self.counts[bits << SUB_BITS] += 1
+        self.count += 1
+        self.total += ns
+        if ns > self.max:
+            self.max = ns
+
+    @staticmethod
+    def Bucket_Value(index: int) -> float:
+        bits = index >> SUB_BITS
+        sub = index & (SUB_BUCKETS - 1)
+        if bits == 0:
+            return 0.0
+        shift = bits - SUB_BITS - 1
+        if shift <= 0:
+            return float(1 << (bits - 1))
+        return float((1 << (bits - 1)) + (sub << shift) + (1 << (shift - 1)))
+
+    def Percentile(self, percentile: float) -> float:
+        if self.count == 0:
+            return 0.0
+        target = self.count * percentile / 100.0
+        seen = 0
+        i = 0
+        while i < len(self.counts):
+            seen += self.counts[i]
+            if seen >= target and self.counts[i] > 0:
+                return min(self.Bucket_Value(i), float(self.max))
+            i += 1
+        return float(self.max)
+
+    def Summary(self) -> dict:
+        summary = {'count': self.count, 'mean_us': self.total / self.count / 1000 if self.count > 0 else 0.0,
+                   'max_us': self.max / 1000}
+        for percentile in PERCENTILES:
+            summary['p' + str(percentile).replace(".", "_") + '_us'] = self.Percentile(percentile) / 1000
+        return summary
+
+
+class Timings:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stages = {}
+        self.dumper = None
+        self.server = None
+
+    def Stage(self, name: str) -> Histogram:
+        stage = self.stages.get(name)
+        if stage is None:
+            with self.lock:
+                stage = self.stages.get(name)
+                if stage is None:
+                    stage = Histogram()
+                    self.stages[name] = stage
+        return stage
+
+    def Record(self, name: str, ns: int):
+        self.Stage(name).Record(ns)
+
+    def Since(self, name: str, start: int) -> int:
+        now = time.perf_counter_ns()
+        self.Stage(name).Record(now - start)
+        return now
+
+    def Report(self) -> dict:
+        return dict((name, stage.Summary()) for name, stage in list(self.stages.items()))
+
+    def Dump(self, path: str):
+        report = {'time': time.time(), 'stages': self.Report()}
+        with open(path + ".tmp", "w") as f:
+            json.dump(report, f, indent=2)
+        # Rename so a reader never sees a half-written report.
+        os.replace(path + ".tmp", path)
+
+    def Start_Dump(self, path: str, interval: float = DUMP_INTERVAL):
+        def dump():
+            self.Dump(path)
+            self.dumper = threading.Timer(interval, dump)
+            self.dumper.daemon = True
+            self.dumper.start()
+
+        self.dumper = threading.Timer(interval, dump)
+        self.dumper.daemon = True
+        self.dumper.start()
+
+    def Serve(self, port: int, host: str = "127.0.0.1"):
+        from flask import Flask, jsonify
+
+        app = Flask(__name__)
+
+        @app.route("/timings")
+        def report():
+            return jsonify(self.Report())
+
+        self.server = threading.Thread(target=app.run, kwargs={'host': host, 'port': port, 'use_reloader': False},
+                                       daemon=True)
+        self.server.start()
+
+
+timings = Timings()
@@ -0,0 +1,144 @@
+import math
+from array import array
+
+
+ESTIMATORS = ["close_to_close", "parkinson", "garman_klass", "ewma"]
+EWMA_LAMBDA = 0.94
+PARKINSON_FACTOR = 1.0 / (4.0 * math.log(2.0))
+GARMAN_KLASS_FACTOR = 2.0 * math.log(2.0) - 1.0
+
+
+class RollingVolatility:
+    def __init__(self, interval: int, window: int, ewma_lambda: float = EWMA_LAMBDA):
+        self.interval = interval
+        self.window = window
+        self.ewma_lambda = ewma_lambda
+
+        self.returns = array('d', [0.0] * window)
+        self.ranges = array('d', [0.0] * window)
+        self.gk_terms = array('d', [0.0] * window)
+        self.head = 0
+        self.count = 0
+        self.return_count = 0
+
+        self.sum_return = 0.0
+        self.sum_return_sq = 0.0
+        self.sum_range = 0.0
+        self.sum_gk = 0.0
+        self.ewma_var = None
+
+        self.bar_start = None
+        self.open = 0.0
+        self.high = 0.0
+        self.low = 0.0
+        self.close = 0.0
+        self.last_close = None
+
+    def Update(self, timestamp: float, price: float):
+        if price <= 0:
+            return
+        bucket = int(timestamp // self.interval) * self.interval
+        if self.bar_start is None:
+            self._open_bar(bucket, price)
+            return
+        if bucket < self.bar_start:
+            return
+        if bucket > self.bar_start:
+            self.AddBar(self.open, self.high, self.low, self.close)
+            self._open_bar(bucket, price)
+            return
+        if price > self.high:
+            self.high = price
+        if price < self.low:
+            self.low = price
+        self.close = price
+
+    def _open_bar(self, bucket: int, price: float):
+        self.bar_start = bucket
+        self.open = price
+        self.high = price
+        self.low = price
+        self.close = price
+
+    def Seed(self, candles: list):
+        for candle in candles:
+            self.AddBar(candle['open'], candle['high'], candle['low'], candle['close'])
+        if len(candles) > 0:
+            self.bar_start = None
+
+    def AddBar(self, open_price: float, high: float, low: float, close: float):
+        if open_price <= 0 or high <= 0 or low <= 0 or close <= 0:
+            return
+
+        hl = math.log(high / low)
+        co = math.log(close / open_price)
+        range_term = hl * hl
+        gk_term = 0.5 * range_term - GARMAN_KLASS_FACTOR * co * co
+
+        ret = 0.0
+        has_return = self.last_close is not None
+        if has_return:
+            ret = math.log(close / self.last_close)
+        self.last_close = close
+
+        slot = self.head
+        if self.count == self.window:
+            self.sum_range = self.sum_range - self.ranges[slot]
+            self.sum_gk = self.sum_gk - self.gk_terms[slot]
+            if self.return_count == self.window:
+                self.sum_return = self.sum_return - self.returns[slot]
+                self.sum_return_sq = self.sum_return_sq - self.returns[slot] * self.returns[slot]
+                self.return_count -= 1
+        else:
+            self.count += 1
+
+        self.ranges[slot] = range_term
+        self.gk_terms[slot] = gk_term
+        self.sum_range = self.sum_range + range_term
+        self.sum_gk = self.sum_gk + gk_term
+
+        self.returns[slot] = ret
+        if has_return:
+            self.sum_return = self.sum_return + ret
+            self.sum_return_sq = self.sum_return_sq + ret * ret
+            self.return_count += 1
+            if self.ewma_var is None:
+                self.ewma_var = ret * ret
+            else:
+                self.ewma_var = self.ewma_lambda * self.ewma_var + (1 - self.ewma_lambda) * ret * ret
+
+        self.head = (self.head + 1) % self.window
+
+    def Ready(self, estimator: str) -> bool:
+        if estimator == "close_to_close":
+            return self.return_count >= 2
+        if estimator == "ewma":
+            return self.ewma_var is not None
+        return self.count >= 1
+
+    def Value(self, estimator: str) -> float:
+        if not self.Ready(estimator):
+            return 0.0
+
+        if estimator == "close_to_close":
+            n = self.return_count
+            mean = self.sum_return / n
+            variance = (self.sum_return_sq - n * mean * mean) / (n - 1)
+        elif estimator == "parkinson":
+            variance = PARKINSON_FACTOR * self.sum_range / self.count
+        elif estimator == "garman_klass":
+            variance = self.sum_gk / self.count
+        elif estimator == "ewma":
+            variance = self.ewma_var
+        else:
+            print("Unknown Volatility Estimator ", estimator)
+            return 0.0
+
+        if variance <= 0:
+            return 0.0
+        return math.sqrt(variance)
+
+    def Sigma(self, estimator: str) -> float:
+        if self.last_close is None:
+            return 0.0
+        return self.Value(estimator) * self.last_close